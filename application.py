@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
 
-from config import config
+from config import config, configure_logging, rehash
 
 import logging
+import signal
 log = logging.getLogger()
 
 import gevent
@@ -11,55 +12,125 @@ import gevent.monkey
 gevent.monkey.patch_all()
 
 from include.dispatcher import Dispatcher
+from include.framing import LineReader
 from include.message import Message
+from include.parser import decode
+from include.resolver import Lookup
 from include.router import Router
 
 from models import Actor
 dispatcher = Dispatcher()
 router = Router(gevent.socket.SHUT_RDWR)
+# Seconds a finished handler waits for what's queued for its client to be
+# written, before the server closes the socket anyway
+CLOSE_TIMEOUT = 10
+
+def as_list(resp):
+    "Responses as a list, which may contain iterators of messages"
+    if resp is None:
+        return []
+    if isinstance(resp, list):
+        return resp
+    return [resp]
+
+
+def handle_line(socket, actor, line):
+    "Parse and dispatch one line, and send the responses"
+    try:
+        msg = Message.from_bytes(line)
+        log.debug('<= %r %r', msg.target, msg)
+        # Streamed responses are rendered while they're sent, so errors
+        # rendering them are handled here too
+        router.send(as_list(dispatcher.dispatch(socket, msg)), actor)
+    except Exception as e:
+        log.exception(e)
+        actor = Actor.by_socket(socket)
+        if actor.is_user() and actor.get_user().registered.nick and actor.get_user().registered.user:
+            resp = [
+                Message(actor, 'NOTICE', 'The message your client has just sent could not be parsed or processed.'),
+                Message(actor, 'NOTICE', 'If this is a problem with the server, please open an issue at:'),
+                Message(actor, 'NOTICE', 'https://github.com/abesto/python-ircd'),
+                Message(actor, 'NOTICE', '---'),
+                Message(actor, 'NOTICE', 'The message sent by your client was:'),
+                Message(actor, 'NOTICE', decode(line).strip("\r\n")),
+                Message(actor, 'NOTICE', 'The error was:'),
+                Message(actor, 'NOTICE', str(e)),
+                Message(actor, 'NOTICE', '---'),
+                Message(actor, 'NOTICE', 'Closing connection.')
+            ]
+            resp += as_list(dispatcher.dispatch(socket, Message(None, 'QUIT', 'Protocol error')))
+        else:
+            resp = [Message(actor, 'ERROR')]
+        actor.disconnect()
+        router.send(resp)
+
+
+def handle_closed(socket):
+    "The client closed the connection"
+    actor = Actor.by_socket(socket)
+    if actor.is_user() and actor.get_user().registered.both:
+        return as_list(dispatcher.dispatch(
+            socket, Message(None, 'QUIT', 'Connection lost')))
+    actor.disconnect()
+    return []
+
 
 def handle(socket, address):
-    fileobj = socket.makefile('rw')
-    while not Actor.by_socket(socket).disconnected:
-        line = fileobj.readline()
-        try:
-            msg = Message.from_string(line)
-            log.debug('<= %s %s' % (repr(msg.target), repr(msg)))
-            resp = dispatcher.dispatch(socket, msg)
-        except Exception as e:
-            log.exception(e)
-            actor = Actor.by_socket(socket)
-            if actor.is_user() and actor.get_user().registered.nick and actor.get_user().registered.user:
-                resp = [
-                    Message(actor, 'NOTICE', 'The message your client has just sent could not be parsed or processed.'),
-                    Message(actor, 'NOTICE', 'If this is a problem with the server, please open an issue at:'),
-                    Message(actor, 'NOTICE', 'https://github.com/abesto/python-ircd'),
-                    Message(actor, 'NOTICE', '---'),
-                    Message(actor, 'NOTICE', 'The message sent by your client was:'),
-                    Message(actor, 'NOTICE', line.strip("\n")),
-                    Message(actor, 'NOTICE', 'The error was:'),
-                    Message(actor, 'NOTICE', str(e)),
-                    Message(actor, 'NOTICE', '---'),
-                    Message(actor, 'NOTICE', 'Closing connection.')
-                ]
-                quit_resp = dispatcher.dispatch(socket, Message(None, 'QUIT', 'Protocol error'))
-                if isinstance(quit_resp, list):
-                    resp += quit_resp
-                else:
-                    resp.append(quit_resp)
-            else:
-                resp = Message(actor, 'ERROR')
-            Actor.by_socket(socket).disconnect()
-
-        try:
-            router.send(resp)
-        except Exception as e:
-            log.exception(e)
-            Actor.by_socket(socket).disconnect()
-
-host = config.get('server', 'listen_host')
-port = config.getint('server', 'listen_port')
-log.info('Starting server, listening on %s:%s' % (host, port))
-server = gevent.server.StreamServer((host, port), handle)
-server.serve_forever()
-log.info('Server stopped')
+    reader = LineReader(socket)
+    # The actor is forgotten once its socket is closed, so it's looked up
+    # only once
+    actor = Actor.by_socket(socket)
+    try:
+        # Runs while the client registers
+        actor.lookup = Lookup(socket)
+        serve(socket, actor, reader)
+    finally:
+        # However the handler ended, the actor is quit and closed
+        if not actor.disconnected:
+            actor.drop('Connection lost')
+        # The router closes the socket once the last replies, like the ERROR
+        # for QUIT, are written; the server closes it as soon as this returns
+        actor.wait_closed(CLOSE_TIMEOUT)
+
+
+def serve(socket, actor, reader):
+    while not actor.disconnected:
+        # Don't take more input while the client doesn't read the output
+        actor.wait_readable()
+        lines = reader.read()
+        if actor.disconnected:
+            break
+        if lines is None:
+            router.send(handle_closed(socket))
+            break
+        actor.received_messages += len(lines)
+        actor.received_bytes += sum(len(line) for line in lines)
+        # The responses to each line are sent before the next line is
+        # handled, so they show the state the line was handled in. Everything
+        # received in one go is still written together, by the writer.
+        for line in lines:
+            if actor.disconnected:
+                break
+            handle_line(socket, actor, line)
+
+
+def hangup():
+    "Rehash on SIGHUP, errors are logged by rehash"
+    try:
+        rehash()
+    except Exception:
+        pass
+
+
+def main():
+    configure_logging()
+    gevent.signal_handler(signal.SIGHUP, hangup)
+    host = config.get('server', 'listen_host')
+    port = config.getint('server', 'listen_port')
+    log.info('Starting server, listening on %s:%s' % (host, port))
+    server = gevent.server.StreamServer((host, port), handle)
+    server.serve_forever()
+    log.info('Server stopped')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+Benchmarks, run from the repository root with e.g.
+python -m benchmarks.startup
+"""
@@ -0,0 +1,100 @@
+"""
+Count the write system calls made to deliver channel traffic.
+
+A number of senders each send messages to a channel of receivers, every
+message with its own Router.send call, and yield to the event loop between
+messages the way separate client lines would. Before writes were coalesced,
+each Router.send flushed every target, so that's one write per message per
+receiver. The benchmark reports the writes made now, with coalescing
+disabled (write_coalesce_ms = 0) and with the configured delay.
+"""
+
+import argparse
+import time
+
+import gevent
+from gevent import socket
+
+from config import config
+from include.message import Message
+from include.router import Router
+from models import Actor, ActorCollection
+
+
+class CountingSocket(object):
+    "Counts the calls that write to the wrapped socket"
+    def __init__(self, socket):
+        self.socket = socket
+        self.writes = 0
+
+    def sendmsg(self, buffers):
+        self.writes += 1
+        return self.socket.sendmsg(buffers)
+
+    def sendall(self, data):
+        self.writes += 1
+        return self.socket.sendall(data)
+
+    def __getattr__(self, name):
+        return getattr(self.socket, name)
+
+
+def drain(sock):
+    while sock.recv(65536):
+        pass
+
+
+def run(receivers, senders, messages, coalesce_ms):
+    config.set('server', 'write_coalesce_ms', str(coalesce_ms))
+    router = Router(socket.SHUT_RDWR)
+    sockets = []
+    readers = []
+    for _ in range(receivers):
+        ours, theirs = socket.socketpair()
+        sockets.append(CountingSocket(ours))
+        readers.append(gevent.spawn(drain, theirs))
+    channel = ActorCollection([Actor(sock) for sock in sockets])
+
+    def sender(index):
+        for number in range(messages):
+            router.send(Message(channel, 'PRIVMSG', '#bench',
+                                'message %d from %d' % (number, index),
+                                prefix='sender%d!user@host' % index))
+            gevent.sleep(0)
+
+    start = time.time()
+    gevent.joinall([gevent.spawn(sender, index) for index in range(senders)])
+    # Let the writers send what's left in the queues
+    while any(actor.sendq for actor in channel):
+        gevent.sleep(0.001)
+    elapsed = time.time() - start
+
+    for sock in sockets:
+        sock.close()
+    gevent.joinall(readers)
+    return sum(sock.writes for sock in sockets), elapsed
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument('--receivers', type=int, default=50)
+    args.add_argument('--senders', type=int, default=20)
+    args.add_argument('--messages', type=int, default=50,
+                      help='messages sent by each sender')
+    args = args.parse_args()
+
+    configured = config.getint('server', 'write_coalesce_ms')
+    delivered = args.receivers * args.senders * args.messages
+    print('%d messages delivered: %d senders x %d messages x %d receivers' % (
+        delivered, args.senders, args.messages, args.receivers))
+    print('  %-34s %8d writes' % ('one write per Router.send', delivered))
+    for coalesce_ms in [0, configured]:
+        writes, elapsed = run(args.receivers, args.senders, args.messages,
+                              coalesce_ms)
+        print('  %-34s %8d writes (%.1fx fewer), %.1f ms' % (
+            'write_coalesce_ms = %d' % coalesce_ms, writes,
+            float(delivered) / writes, elapsed * 1000))
+    config.set('server', 'write_coalesce_ms', str(configured))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Measure PING round-trip times of an idle client while a giant channel is
+being flooded.
+
+The server runs in this process with application.handle. The channel
+members have sockets that discard everything written to them, and the
+flood is sent straight through the router at a fixed rate. A real client
+pings the server over TCP meanwhile. This runs once with chunked fan-out
+disabled (fanout_chunk_ms = 0) and once with the configured chunk budget.
+"""
+
+import argparse
+import time
+
+import application
+
+import gevent
+import gevent.server
+from gevent import socket
+
+from benchmarks.sockets import NullSocket
+from config import config
+from include.message import Message
+from models import Actor, ActorCollection
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def read_until(sock, text):
+    data = b''
+    while text not in data:
+        received = sock.recv(4096)
+        if not received:
+            raise RuntimeError('Connection closed')
+        data += received
+    return data
+
+
+def flood(channel, rate):
+    message = 'x' * 80
+    while True:
+        application.router.send(Message(channel, 'PRIVMSG', '#giant', message,
+                                         prefix='flood!flood@localhost'))
+        gevent.sleep(1.0 / rate)
+
+
+def ping_times(port, duration):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(b'NICK pinger\r\nUSER pinger 0 * :Pinger\r\n')
+    read_until(sock, b' 376 ')
+    times = []
+    end = time.time() + duration
+    number = 0
+    while time.time() < end:
+        number += 1
+        start = time.time()
+        sock.sendall(('PING :%d\r\n' % number).encode())
+        read_until(sock, ('%d\r\n' % number).encode())
+        times.append(time.time() - start)
+        gevent.sleep(0.01)
+    sock.sendall(b'QUIT\r\n')
+    sock.close()
+    return times
+
+
+def run(members, rate, duration, chunk_ms):
+    config.set('server', 'fanout_chunk_ms', str(chunk_ms))
+    server = gevent.server.StreamServer(('127.0.0.1', 0), application.handle)
+    server.start()
+    channel = ActorCollection([Actor(NullSocket()) for _ in range(members)])
+    flooder = gevent.spawn(flood, channel, rate)
+    try:
+        return ping_times(server.server_port, duration)
+    finally:
+        flooder.kill()
+        server.stop()
+        while application.router.fanout.queue:
+            gevent.sleep(0.01)
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument('--members', type=int, default=10000)
+    args.add_argument('--rate', type=float, default=5,
+                      help='messages per second sent to the channel')
+    args.add_argument('--duration', type=float, default=5,
+                      help='seconds of pinging for each run')
+    args = args.parse_args()
+
+    configured = config.getint('server', 'fanout_chunk_ms')
+    print('PING round trips while sending %g messages/s to %d members' % (
+        args.rate, args.members))
+    for chunk_ms in [0, configured]:
+        times = run(args.members, args.rate, args.duration, chunk_ms)
+        print('  fanout_chunk_ms = %-3d %5d pings: p50 %6.1f ms, '
+              'p99 %6.1f ms, max %6.1f ms' % (
+                  chunk_ms, len(times), percentile(times, 0.5) * 1000,
+                  percentile(times, 0.99) * 1000, max(times) * 1000))
+    config.set('server', 'fanout_chunk_ms', str(configured))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Measure the memory used by each idle client connection, by each channel
+membership, and by each message.
+
+Clients are simulated without sockets: each one gets the Actor, User and
+LineReader a real connection gets, with the attributes set the way the
+NICK and USER commands set them, from one of a few hosts. Then every client
+joins a number of channels. Memory is measured with tracemalloc, so only
+Python allocations are counted, not greenlet stacks or kernel buffers.
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from benchmarks.sockets import NullSocket
+from config import config
+from include.framing import LineReader
+from include.message import Message
+from models import Actor, Channel, User
+
+try:
+    from sys import intern
+except ImportError:
+    pass
+
+
+def traced():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def connect(number, hosts):
+    "An idle registered client, like after NICK and USER"
+    socket = NullSocket()
+    actor = Actor.by_socket(socket)
+    user = User('user%d' % number)
+    actor.user = user
+    user.username = 'ident%d' % number
+    # Resolved hostnames are new strings for every connection
+    user.hostname = intern('host%d.example.net' % (number % hosts))
+    user.servername = intern(config.get('server', 'servername'))
+    user.realname = 'Client number %d' % number
+    user.registered.nick = True
+    user.registered.user = True
+    user.save()
+    return actor, LineReader(socket)
+
+
+def messages(count):
+    return [Message(None, 'PRIVMSG', '#channel', 'message %d' % number,
+                    prefix='nick!user@host.example.net')
+            for number in range(count)]
+
+
+def run(clients, hosts, channels, channel_size):
+    start = traced()
+    connections = [connect(number, hosts) for number in range(clients)]
+    connected = traced()
+
+    users = [actor.get_user() for actor, _ in connections]
+    channel_count = clients * channels // channel_size
+    for number in range(channel_count):
+        channel = Channel('#channel%d' % number)
+        channel.save()
+        for member in range(channel_size):
+            users[(number * channel_size + member) % clients].join(channel)
+    joined = traced()
+
+    sample = messages(10000)
+    for message in sample:
+        message.wire()
+    sent = traced()
+
+    per_connection = float(connected - start) / clients
+    per_membership = float(joined - connected) / (channel_count * channel_size)
+    per_message = float(sent - joined) / len(sample)
+
+    del sample
+    # Parting the last member deletes the channel
+    for channel in list(Channel.all()):
+        for user in list(channel.users):
+            user.part(channel)
+    for actor, _ in connections:
+        actor.get_user().delete()
+        actor.delete()
+    return per_connection, per_membership, per_message
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument('--clients', type=int, nargs='+',
+                      default=[10000, 50000, 100000])
+    args.add_argument('--hosts', type=int, default=100,
+                      help='distinct hostnames the clients connect from')
+    args.add_argument('--channels', type=int, default=5,
+                      help='channels each client joins')
+    args.add_argument('--channel-size', type=int, default=20)
+    args = args.parse_args()
+
+    tracemalloc.start()
+    print('Python %s, %d channels of %d members per client' % (
+        sys.version.split()[0], args.channels, args.channel_size))
+    for clients in args.clients:
+        connection, membership, message = run(
+            clients, args.hosts, args.channels, args.channel_size)
+        print('  %6d clients: %6d bytes per idle connection, '
+              '%5d bytes per channel membership, %4d bytes per message' % (
+                  clients, connection, membership, message))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+"Sockets for the simulated clients of the benchmarks"
+
+
+class NullSocket(object):
+    "Discards everything written to it"
+    def sendmsg(self, buffers):
+        return sum(len(data) for data in buffers)
+
+    def shutdown(self, how):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,112 @@
+"""
+Measure how long a fresh server process takes to accept connections, and
+how much importing each module costs.
+
+Every measurement runs in a new interpreter, so import costs include all
+dependencies that weren't imported before. Exits with status 1 if the
+median time-to-listen is over the budget.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'config',
+    'include.parser',
+    'include.message',
+    'include.validators',
+    'include.wildcard',
+    'include.numeric_responses',
+    'include.dispatcher',
+    'include.router',
+    'include.abnf',
+    'models',
+    'commands.join',
+    'commands.nick',
+    'commands.privmsg',
+    'commands.user',
+    'commands.who',
+]
+
+IMPORT_SCRIPT = '''
+import time
+start = time.time()
+import %s
+print(time.time() - start)
+'''
+
+SERVER_SCRIPT = '''
+from config import config
+config.set('server', 'listen_host', '127.0.0.1')
+config.set('server', 'listen_port', '%d')
+import runpy
+runpy.run_path('application.py', run_name='__main__')
+'''
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def import_cost(module):
+    output = subprocess.check_output(
+        [sys.executable, '-c', IMPORT_SCRIPT % module], cwd=ROOT)
+    return float(output.decode().strip())
+
+
+def time_to_listen(timeout=30):
+    port = free_port()
+    start = time.time()
+    with open(os.devnull, 'w') as devnull:
+        process = subprocess.Popen(
+            [sys.executable, '-c', SERVER_SCRIPT % port],
+            cwd=ROOT, stdout=devnull, stderr=devnull)
+    try:
+        while time.time() - start < timeout:
+            try:
+                socket.create_connection(('127.0.0.1', port), 0.1).close()
+                return time.time() - start
+            except socket.error:
+                time.sleep(0.001)
+        raise RuntimeError('Server did not start listening in %ss' % timeout)
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument('--runs', type=int, default=5)
+    args.add_argument('--budget', type=float, default=1.0,
+                      help='maximum median time-to-listen in seconds')
+    args = args.parse_args()
+
+    print('Import cost per module (median of %d runs):' % args.runs)
+    for module in MODULES:
+        cost = median([import_cost(module) for _ in range(args.runs)])
+        print('  %-28s %7.1f ms' % (module, cost * 1000))
+
+    times = [time_to_listen() for _ in range(args.runs)]
+    print('Time to listen: median %.1f ms, min %.1f ms, max %.1f ms' % (
+        median(times) * 1000, min(times) * 1000, max(times) * 1000))
+    if median(times) > args.budget:
+        print('Over budget of %.1f ms' % (args.budget * 1000))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
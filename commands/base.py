@@ -6,6 +6,10 @@ class Command(object):
     command = None
     user_registration_command = False
     server_registration_command = False
+    # A trailing parameter at this index or later is only relayed to other
+    # clients; it's passed to the handler as a memoryview of the received
+    # line instead of being decoded
+    relayed_parameter = None
 
     def __init__(self):
         self.cleanup()
@@ -38,28 +42,29 @@ class Command(object):
                 'command must be set on Handler subclass')
         if self.command != message.command:
             raise "Wrong handler for " + repr(message)
+        parameters = message.get_parameters(self.relayed_parameter)
 
         if not actor.is_user() and not actor.is_server():
             if self.user_registration_command:
                 if self.server_registration_command:
                     return self.common()
-                return self.from_user(*message.parameters)
+                return self.from_user(*parameters)
             elif self.server_registration_command:
-                return self.from_server(*message.parameters)
+                return self.from_server(*parameters)
             else:
                 return ERR_NOTREGISTERED(actor)
 
-        if len(message.parameters) < self.required_parameter_count:
+        if len(parameters) < self.required_parameter_count:
             return ERR_NEEDMOREPARAMS(self.command, actor)
         elif actor.is_server():
             self.server = self.actor.get_server()
-            return self.from_server(*message.parameters)
+            return self.from_server(*parameters)
         elif self.actor.is_user():
             self.user = self.actor.get_user()
             registered = self.user.registered.both
             if not (self.user_registration_command or registered):
                 return ERR_NOTREGISTERED(self.actor)
             message.prefix = str(self.user)
-            return self.from_user(*message.parameters)
+            return self.from_user(*parameters)
         else:
             raise Exception('Don\'t know what to do :(')
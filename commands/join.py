@@ -2,7 +2,6 @@ from include.numeric_responses import *
 from include.message import Message as M
 
 from models.channel import Channel
-from models.actorcollection import ActorCollection
 
 from include.flatten import flatten
 
@@ -80,11 +79,11 @@ class JoinCommand(Command):
 
     def join_message(self, channel):
         ret = [
-            M(ActorCollection(channel.users),
+            M(channel.recipients,
               'JOIN', str(channel),
               prefix=self.user),
             RPL_NAMEREPLY(self.actor, channel),
-            RPL_ENDOFNAMES(self.actor)
+            RPL_ENDOFNAMES(self.actor, channel)
         ]
         if channel.topic is not None:
             ret.append(RPL_TOPIC(self.actor, channel))
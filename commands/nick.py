@@ -1,9 +1,11 @@
+from itertools import chain
+
 from commands.base import Command
 from models.user import User
 from models.server import Server
 from models.actorcollection import ActorCollection
 
-from include import abnf
+from include import validators
 from include.numeric_responses import *
 from include.message import Message as M
 
@@ -64,8 +66,7 @@ class NickCommand(Command):
             return ERR_NONICKNAMEGIVEN(self.actor)
 
     def check_invalid_nick(self):
-        parsed_nick = abnf.parse(self.params.nick, abnf.nickname)
-        if len(self.params.nick) > 9 or parsed_nick != self.params.nick:
+        if not validators.is_nickname(self.params.nick):
             nick = self.params.nick.replace(' ', '_')
             return ERR_ERRONEUSNICKNAME(nick, self.actor)
 
@@ -81,6 +82,9 @@ class NickCommand(Command):
         if self.user.registered.nick and\
            self.user.registered.user and\
            self.user is User.get(self.params.nick):
+            # changing only the case of it is a rename
+            if self.user.nickname != self.params.nick:
+                return
             return ReturnNone
         # real collision
         return ERR_NICKNAMEINUSE(self.params.nick, self.actor)
@@ -119,9 +123,8 @@ class NickCommand(Command):
     def rename(self):
         from_full = str(self.user)
         self.user.rename(self.params.nick)
-        targets = [self.actor] + Server.all()
-        for channel in self.user.channels:
-            targets += channel.users
+        targets = chain([self.actor], Server.all(),
+                        self.user.all_neighbours())
         return M(ActorCollection(targets),
                  'NICK', self.params.nick,
                  prefix=from_full)
@@ -2,7 +2,6 @@ from include.numeric_responses import *
 from include.message import Message as M
 
 from models.channel import Channel
-from models.actorcollection import ActorCollection
 
 from commands.base import Command
 
@@ -10,6 +9,7 @@ from commands.base import Command
 class PartCommand(Command):
     required_parameter_count = 1
     command = 'PART'
+    relayed_parameter = 1
 
     def from_user(self, channels, msg='leaving', *_):
         channels = channels.split(',')
@@ -24,7 +24,7 @@ class PartCommand(Command):
             if self.user not in channel.users:
                 ret.append(ERR_NOTONCHANNEL(channel_name, self.actor))
                 continue
-            ret.append(M(ActorCollection(channel.users),
+            ret.append(M(channel.recipients,
                          'PART', str(channel), msg,
                          prefix=str(self.user)
             ))
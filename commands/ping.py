@@ -6,6 +6,7 @@ from commands.base import Command
 class PingCommand(Command):
     required_parameter_count = 1
     command = 'PING'
+    relayed_parameter = 0
 
     def from_user(self, *args):
         return M(self.actor, 'PONG', *args)
@@ -2,7 +2,6 @@ from include.message import Message as M
 from include.numeric_responses import *
 
 from models.actor import Actor
-from models.actorcollection import ActorCollection
 from models.channel import Channel
 from models.user import User
 
@@ -12,6 +11,7 @@ from commands.base import Command
 class PrivmsgCommand(Command):
     required_parameter_count = 0
     command = 'PRIVMSG'
+    relayed_parameter = 1
 
     def from_user(self, receivers=None, text=None, *_):
         if receivers is None:
@@ -22,11 +22,9 @@ class PrivmsgCommand(Command):
         # TODO: check for ERR_TOOMANYTARGETS
         for receiver in receivers.split(','):
             if Channel.exists(receiver):
-                users = [user
-                         for user in Channel.get(receiver).users
-                         if user is not self.user]
+                channel = Channel.get(receiver)
                 resp.append(M(
-                    ActorCollection(users),
+                    channel.recipients.excluding(self.actor),
                     self.command, str(receiver), text,
                     prefix=str(self.user)))
             elif User.exists(receiver):
@@ -7,16 +7,14 @@ from models.actorcollection import ActorCollection
 class QuitCommand(Command):
     required_parameter_count = 0
     command = 'QUIT'
+    relayed_parameter = 0
 
     def from_user(self, message='leaving', *_):
         ret = []
-        for channel in self.user.channels:
-            channel.part(self.user)
-            ret.append(
-                M(ActorCollection(channel.users),
-                  'PART', str(channel), message,
-                  prefix=str(self.user))
-            )
+        neighbours = self.user.all_neighbours()
+        if neighbours:
+            ret.append(M(ActorCollection.of_users(neighbours),
+                         'QUIT', message, prefix=str(self.user)))
         self.user.delete()
         self.actor.disconnect()
         return ret + [M(self.actor, 'ERROR')]
@@ -0,0 +1,24 @@
+import os
+
+from config import config_file, rehash
+from include.message import Message as M
+from include.numeric_responses import *
+
+from commands.base import Command
+
+
+class RehashCommand(Command):
+    required_parameter_count = 0
+    command = 'REHASH'
+
+    def from_user(self, *_):
+        # TODO: there's no OPER command yet to become an operator
+        mode = self.user.mode
+        if not (mode.operator or mode.local_operator):
+            return ERR_NOPRIVILEGES(self.actor)
+        try:
+            rehash()
+        except Exception as e:
+            return M(self.actor, 'NOTICE', self.user.nickname,
+                     'Rehash failed, the configuration is unchanged: %s' % e)
+        return RPL_REHASHING(self.actor, os.path.basename(config_file))
@@ -0,0 +1,32 @@
+import time
+
+from include.numeric_responses import *
+
+from models import lifecycle
+from models.actor import Actor
+
+from commands.base import Command
+
+
+class StatsCommand(Command):
+    required_parameter_count = 0
+    command = 'STATS'
+
+    def from_user(self, query=None, *_):
+        # TODO: queries other than l and z, target parameter
+        mode = self.user.mode
+        if not (mode.operator or mode.local_operator):
+            return ERR_NOPRIVILEGES(self.actor)
+        ret = []
+        if query in ('l', 'L'):
+            now = time.time()
+            ret += [RPL_STATSLINKINFO(self.actor, actor, now)
+                    for actor in Actor.all() if actor.is_user()]
+        elif query == 'z':
+            # Model objects, to spot leaks
+            ret += [RPL_STATSDEBUG(self.actor, query, cls.__name__, counter)
+                    for cls, counter in sorted(
+                        lifecycle.counters.items(),
+                        key=lambda item: item[0].__name__)]
+        ret.append(RPL_ENDOFSTATS(self.actor, query or '*'))
+        return ret
@@ -2,7 +2,6 @@ from include.numeric_responses import *
 
 import models
 from models.channel import Channel
-from models.actorcollection import ActorCollection
 
 from commands.base import Command
 
@@ -28,5 +27,5 @@ class TopicCommand(Command):
         else:
             channel.topic = topic
         # Forward message to others on the channel
-        self.message.target = ActorCollection(channel.users)
+        self.message.target = channel.recipients
         return self.message
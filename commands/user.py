@@ -1,13 +1,17 @@
-from dns import resolver, reversename
-
 from config import config
 
 from models.user import User
 from include.numeric_responses import *
+from include.resolver import Lookup
 
 from ._welcome import welcome
 from commands.base import Command
 
+try:
+    from sys import intern
+except ImportError:
+    pass
+
 
 class UserCommand(Command):
     required_parameter_count = 4
@@ -21,18 +25,21 @@ class UserCommand(Command):
         if self.user.registered.user:
             return ERR_ALREADYREGISTRED(self.actor)
 
-        self.user.username = username
-        self.user.hostname = self.actor.socket.getpeername()[0]
-        try:
-            addr = reversename.from_address(self.user.hostname)
-            self.user.hostname = str(resolver.query(addr, "PTR")[0])
-        except:
-            pass
-        self.user.servername = config.get('server', 'servername')
-        self.user.realname = realname
-
-        self.user.registered.user = True
-
-        if self.user.registered.nick:
-            self.user.save()
-            return welcome(self.actor)
+        # Waiting for the lookups lets other clients run, and they may use
+        # this handler meanwhile, so self.actor and self.user aren't used
+        # after it
+        actor, user = self.actor, self.user
+        # Started when the client connected, in application.handle
+        lookup = actor.lookup or Lookup(actor.socket)
+        actor.lookup = None
+        hostname, user.username = lookup.result(username)
+        # Many users share these, so they share one string
+        user.hostname = intern(hostname)
+        user.servername = intern(config.snapshot.servername)
+        user.realname = realname
+
+        user.registered.user = True
+
+        if user.registered.nick:
+            user.save()
+            return welcome(actor)
@@ -1,4 +1,6 @@
-from include import abnf
+from itertools import islice
+
+from config import config
 from include.numeric_responses import *
 
 from models.channel import Channel
@@ -6,6 +8,20 @@ from models.user import User
 
 from commands.base import Command
 
+# Most RPL_WHOREPLYs rendered into one buffer
+BURST_SIZE = 100
+
+
+def matching_users(mask):
+    "Users with the host, server, real name or nickname matching mask"
+    seen = set()
+    for index in [User.by_hostname, User.by_server, User.by_realname,
+                  User.by_nickname]:
+        for user in index.match(mask):
+            if user not in seen:
+                seen.add(user)
+                yield user
+
 
 class WhoCommand(Command):
     required_parameter_count = 1
@@ -19,22 +35,23 @@ class WhoCommand(Command):
         # after processing each list item with <name> being
         # the item.
 
-        resp = []
         if Channel.exists(mask):
             channel = Channel.get(mask)
-            for channel_user in channel.users:
-                resp.append(
-                    RPL_WHOREPLY(self.actor, channel_user, str(channel))
-                )
+            users = channel.users
+            mask = str(channel)
         else:
             if mask == '0':
                 mask = '*'
-            parser = abnf.wildcard(mask)
-            for user in User.all():
-                # TODO: add check for servername
-                if any([abnf.parse(str, parser)
-                        for str
-                        in [user.hostname, user.realname, user.nickname]]):
-                    resp.append(RPL_WHOREPLY(self.actor, user, mask))
-        #resp.append(RPL_ENDOFWHO(self.user, str(channel)))
-        return resp
+            users = matching_users(mask)
+        # Matched now, while nothing else runs: the indexes and channels may
+        # change while the replies are streamed
+        users = list(islice(users, config.snapshot.max_results))
+        return self.replies(self.actor, users, mask)
+
+    @staticmethod
+    def replies(actor, users, mask):
+        "Rendered while the router streams them, a burst at a time"
+        for start in range(0, len(users), BURST_SIZE):
+            yield RPL_WHOREPLY_BURST(actor, users[start:start + BURST_SIZE],
+                                     mask)
+        yield RPL_ENDOFWHO(actor, mask)
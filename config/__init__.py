@@ -1,28 +1,160 @@
+from collections import namedtuple
+import logging
 import os
 from six.moves.configparser import SafeConfigParser
 from datetime import datetime
 import pydispatch
 from pydispatch import dispatcher
-import logging.config
+
+
+# The options in a Snapshot, with their types
+OPTIONS = [
+    ('server', 'listen_host', str),
+    ('server', 'listen_port', int),
+    ('server', 'log_config', str),
+    ('server', 'servername', str),
+    ('server', 'motd_file', str),
+    ('server', 'created', str),
+    ('server', 'sendq_limit', int),
+    ('server', 'sendq_high_water', int),
+    ('server', 'write_coalesce_ms', int),
+    ('server', 'fanout_chunk_ms', int),
+    ('server', 'max_results', int),
+    ('server', 'lookup_timeout_ms', int),
+    ('server', 'dns_cache_ttl', int),
+    ('server', 'dns_negative_ttl', int),
+    ('server', 'dns_cache_size', int),
+    ('server', 'ident', bool),
+    ('parser', 'trailing_spaces', bool),
+    ('parser', 'soft_eol', bool),
+    ('parser', 'lowercase_commands', bool),
+    ('parser', 'engine', str),
+]
+
+Snapshot = namedtuple('Snapshot', [option for _, option, _ in OPTIONS])
+
+# Options that only take effect when the server is started
+RESTART_OPTIONS = ['server.listen_host', 'server.listen_port']
+
+log = logging.getLogger(__name__)
 
 
 class SignalingSafeConfigParser(SafeConfigParser):
+    """
+    Sends the 'section.option' signal when an option is set. Hot paths read
+    the typed values of snapshot instead of parsing them every time; it's
+    replaced before the signal is sent, so receivers see the new value.
+    """
+    getters = {
+        str: SafeConfigParser.get,
+        int: SafeConfigParser.getint,
+        bool: SafeConfigParser.getboolean,
+    }
+
     def set(self, section, option, value=None):
         SafeConfigParser.set(self, section, option, value)
+        self.take_snapshot()
         dispatcher.send('%s.%s' % (section, option), 'config')
 
+    def read(self, *args, **kwargs):
+        result = SafeConfigParser.read(self, *args, **kwargs)
+        self.take_snapshot()
+        return result
+
+    def take_snapshot(self):
+        "Replace snapshot with the current values; missing options are None"
+        values = []
+        for section, option, kind in OPTIONS:
+            if self.has_option(section, option):
+                values.append(self.getters[kind](self, section, option))
+            else:
+                values.append(None)
+        self.snapshot = Snapshot(*values)
+
+    def reread(self, filename):
+        """
+        Read filename again and apply the options whose values changed: the
+        snapshot is replaced once, then only the signals of those options
+        are sent, and 'rehash' last. Options missing from the file keep
+        their values. Returns the changed options as 'section.option'. If
+        the file can't be read or has invalid values, raises an error and
+        changes nothing.
+        """
+        fresh = SafeConfigParser(self.defaults())
+        if not fresh.read(filename):
+            raise IOError('Can\'t read %s' % filename)
+        # (section, option, previous value or None)
+        changed = []
+        added = []
+        for section in fresh.sections():
+            if not self.has_section(section):
+                self.add_section(section)
+                added.append(section)
+            for option in fresh.options(section):
+                value = fresh.get(section, option, raw=True)
+                previous = None
+                if self.has_option(section, option):
+                    previous = self.get(section, option, raw=True)
+                if value != previous:
+                    changed.append((section, option, previous))
+                    SafeConfigParser.set(self, section, option, value)
+        try:
+            self.take_snapshot()
+        except ValueError:
+            for section, option, previous in changed:
+                if previous is None:
+                    self.remove_option(section, option)
+                else:
+                    SafeConfigParser.set(self, section, option, previous)
+            for section in added:
+                self.remove_section(section)
+            self.take_snapshot()
+            raise
+        names = ['%s.%s' % (section, option) for section, option, _ in changed]
+        for name in names:
+            dispatcher.send(name, 'config')
+        dispatcher.send('rehash', 'config')
+        return names
+
 config_path = os.path.dirname(__file__)
+config_file = os.path.join(config_path, 'server.ini')
 config = SignalingSafeConfigParser({
     'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
 })
-config.read(os.path.join(config_path, 'server.ini'))
+config.read(config_file)
 
 
 def set_decorator(f):
     return f
 
-__all__ = ['config']
 
-logging.config.fileConfig(os.path.join(
-    config_path, config.get('server', 'log_config')
-))
+def configure_logging():
+    """
+    Called on startup instead of on import, so importing config is cheap,
+    and again on every rehash
+    """
+    import logging.config
+    # The modules' loggers exist already, they're configured, not disabled
+    logging.config.fileConfig(os.path.join(
+        config_path, config.snapshot.log_config
+    ), disable_existing_loggers=False)
+    dispatcher.connect(configure_logging, 'rehash', 'config')
+
+
+def rehash():
+    """
+    Re-read server.ini, on SIGHUP or REHASH. Returns the changed options.
+    If the file can't be used, the error is logged and raised again.
+    """
+    try:
+        changed = config.reread(config_file)
+    except Exception as e:
+        log.error('Rehash failed, the configuration is unchanged: %s', e)
+        raise
+    log.info('Rehashed, changed options: %s', ', '.join(changed) or 'none')
+    for name in changed:
+        if name in RESTART_OPTIONS:
+            log.warning('%s only takes effect after a restart', name)
+    return changed
+
+__all__ = ['config', 'config_file', 'configure_logging', 'rehash']
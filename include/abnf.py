@@ -1,13 +1,42 @@
 """
 Parse incoming messages using pyparsing.
 Wildcards are recognized using regular expressions.
+
+Rules are only built when they are first used: importing this module
+doesn't construct any pyparsing objects.
 """
 
-from pyparsing import ParseException, oneOf, Suppress, Literal, Or, \
-    ZeroOrMore, Group, Optional, OneOrMore, And, StringStart, StringEnd, Regex
+from pyparsing import ParseException, Suppress, Literal, Or, \
+    ZeroOrMore, Group, Optional, OneOrMore, And, StringStart, StringEnd, \
+    Regex, oneOf
 from pydispatch import dispatcher
 
 from config import config
+from . import parser as fast_parser
+
+
+class Rule(object):
+    """
+    Lazily built grammar rule. Calling the rule returns the pyparsing
+    object, other attributes are looked up on the pyparsing object.
+    """
+    def __init__(self, build):
+        self.build = build
+        self.element = None
+
+    def __call__(self):
+        if self.element is None:
+            self.element = self.build()
+        return self.element
+
+    def reset(self, *_, **__):
+        self.element = None
+
+    def __getattr__(self, name):
+        return getattr(self(), name)
+
+
+rule = Rule
 
 
 def flatten(L):
@@ -38,105 +67,123 @@ def parse(str, parser):
 
 def charclass(*classes):
     "Helper, similar to srange applied to [a-b]"
-    l = []
-    for (min, max) in classes:
-        l += [chr(i) for i in range(min, max + 1)]
-    return oneOf(l)
+    return Regex('[%s]' % fast_parser.charclass(*classes))
 
 ###
 # Some core rules
 ###
-alpha = charclass((0x41, 0x5A), (0x61, 0x7A))
-digit = charclass((0x30, 0x39))
-hexdigit = charclass((0x30, 0x39), (ord('A'), ord('F')))
-space = Suppress(' ')
-cr = Suppress('\r')
-lf = Suppress('\n')
-crlf = cr + lf
+alpha = Rule(lambda: charclass((0x41, 0x5A), (0x61, 0x7A)))
+digit = Rule(lambda: charclass((0x30, 0x39)))
+hexdigit = Rule(lambda: charclass((0x30, 0x39), (ord('A'), ord('F'))))
+space = Rule(lambda: Suppress(' '))
+cr = Rule(lambda: Suppress('\r'))
+lf = Rule(lambda: Suppress('\n'))
+crlf = Rule(lambda: cr() + lf())
 
 ###
 # IRC / python-ircd specific rules
 ###
-soft_eol = cr ^ lf ^ crlf
+soft_eol = Rule(lambda: cr() ^ lf() ^ crlf())
 
 letter = alpha
-special = charclass((0x5B, 0x60), (0x7B, 0x7D))
+special = Rule(lambda: charclass((0x5B, 0x60), (0x7B, 0x7D)))
+
+
+@rule
+def nospcrlfcl():
+    return charclass(
+        (0x01, 0x09),
+        (0x0B, 0x0C),
+        (0x0E, 0x1F),
+        (0x21, 0x39),
+        (0x3B, 0xFF)
+    )
 
-nospcrlfcl = charclass(
-    (0x01, 0x09),
-    (0x0B, 0x0C),
-    (0x0E, 0x1F),
-    (0x21, 0x39),
-    (0x3B, 0xFF)
-)
 
 # Used as part of hostname
-shortname = (letter ^ digit) + \
-            ZeroOrMore(letter ^ digit ^ '-') + \
-            ZeroOrMore(letter ^ digit)
+@rule
+def shortname():
+    return (letter() ^ digit()) + \
+        ZeroOrMore(letter() ^ digit() ^ '-') + \
+        ZeroOrMore(letter() ^ digit())
 
-hostname = shortname + ZeroOrMore('.' + shortname)
+hostname = Rule(lambda: shortname() + ZeroOrMore('.' + shortname()))
 
 # Used as part of params
-middle = Group(nospcrlfcl + ZeroOrMore(':' ^ nospcrlfcl))
+middle = Rule(lambda: Group(nospcrlfcl() + ZeroOrMore(':' ^ nospcrlfcl())))
 
 # Used as part of params
-trailing = Group(ZeroOrMore(oneOf([':', ' ']) ^ nospcrlfcl))
+trailing = Rule(lambda: Group(ZeroOrMore(oneOf([':', ' ']) ^ nospcrlfcl())))
 
-params = (((0, 14) * (space + middle)) +
-             Optional(space + Suppress(':') + trailing)) ^ \
-         (14 * (space + middle) +
-          Optional(space + Optional(Suppress(':')) + trailing))
-params.leaveWhitespace()
+
+@rule
+def params():
+    element = (((0, 14) * (space() + middle())) +
+               Optional(space() + Suppress(':') + trailing())) ^ \
+              (14 * (space() + middle()) +
+               Optional(space() + Optional(Suppress(':')) + trailing()))
+    element.leaveWhitespace()
+    return element
 
 servername = hostname
 
-ip4addr = 3 * ((1, 3) * digit + '.') + ((1, 3) * digit)
-ip6addr = ('0:0:0:0:0:' + oneOf('0 FFFF') + ':' + ip4addr) ^ \
-          (OneOrMore(hexdigit) + 7 * (':' + OneOrMore(hexdigit)))
-hostaddr = ip4addr ^ ip6addr
+ip4addr = Rule(lambda: 3 * ((1, 3) * digit() + '.') + ((1, 3) * digit()))
 
-host = hostname ^ hostaddr
 
-user = OneOrMore(charclass(
-    (0x01, 0x09),
-    (0x0B, 0x0C),
-    (0x0E, 0x1F),
-    (0x21, 0x3F),
-    (0x41, 0xFF)
-)).leaveWhitespace()
+@rule
+def ip6addr():
+    return ('0:0:0:0:0:' + oneOf('0 FFFF') + ':' + ip4addr()) ^ \
+        (OneOrMore(hexdigit()) + 7 * (':' + OneOrMore(hexdigit())))
 
+hostaddr = Rule(lambda: ip4addr() ^ ip6addr())
 
-nickname = (letter ^ special) + \
-           (0, 8) * (letter ^ digit ^ special ^ '-')
+host = Rule(lambda: hostname() ^ hostaddr())
 
-# Used as part of message
-prefix = servername ^ \
-         nickname + Optional('!' + user) + '@' + host
 
-# Used as part of message
-command = OneOrMore(letter) ^ (3 * digit)
+@rule
+def user():
+    return OneOrMore(charclass(
+        (0x01, 0x09),
+        (0x0B, 0x0C),
+        (0x0E, 0x1F),
+        (0x21, 0x3F),
+        (0x41, 0xFF)
+    )).leaveWhitespace()
+
 
-message = None
+@rule
+def nickname():
+    return (letter() ^ special()) + \
+        (0, 8) * (letter() ^ digit() ^ special() ^ '-')
 
 
-def build_message():
-    global message
-    message = Group(Optional(Suppress(Literal(':')) + prefix + space)) + \
-              Group(command) + \
-              Group(Optional(params))
-    if config.getboolean('parser', 'trailing_spaces'):
-        message += ZeroOrMore(space)
-    if config.getboolean('parser', 'soft_eol'):
-        message += cr ^ lf ^ crlf
+# Used as part of message
+@rule
+def prefix():
+    return servername() ^ \
+        nickname() + Optional('!' + user()) + '@' + host()
+
+# Used as part of message
+command = Rule(lambda: OneOrMore(letter()) ^ (3 * digit()))
+
+
+@rule
+def message():
+    element = Group(Optional(Suppress(Literal(':')) + prefix() + space())) + \
+        Group(command()) + \
+        Group(Optional(params()))
+    if config.snapshot.trailing_spaces:
+        element += ZeroOrMore(space())
+    if config.snapshot.soft_eol:
+        element += cr() ^ lf() ^ crlf()
     else:
-        message += crlf
-    message.leaveWhitespace()
-build_message()
-dispatcher.connect(build_message, 'parser.trailing_spaces', 'config')
-dispatcher.connect(build_message, 'parser.soft_eol', 'config')
+        element += crlf()
+    element.leaveWhitespace()
+    return element
+dispatcher.connect(message.reset, 'parser.trailing_spaces', 'config')
+dispatcher.connect(message.reset, 'parser.soft_eol', 'config')
 
-chanstring = charclass(
+chanstring = Rule(lambda: charclass(
     (0x01, 0x06),
     (0x08, 0x09),
     (0x0B, 0x0C),
@@ -144,27 +191,35 @@ chanstring = charclass(
     (0x21, 0x2B),
     (0x2D, 0x39),
     (0x3B, 0xFF)
-)
-channelid = 5 * (charclass((0x41, 0x5A)) ^ digit)
-
-channel = And([
-    Or([
-        oneOf('# + &'),
-        Literal('!') + Group(channelid)
-    ]),
-    Group(OneOrMore(chanstring)),
-    Optional(Suppress(Literal(':')) + Group(OneOrMore(chanstring)))
-])
+))
+channelid = Rule(lambda: 5 * (charclass((0x41, 0x5A)) ^ digit()))
+
+
+@rule
+def channel():
+    return And([
+        Or([
+            oneOf('# + &'),
+            Literal('!') + Group(channelid())
+        ]),
+        Group(OneOrMore(chanstring())),
+        Optional(Suppress(Literal(':')) + Group(OneOrMore(chanstring())))
+    ])
 
 ###
 # Wildcard expressions
 ###
-wildone = Literal('?')
-wildmany = Literal('*')
-nowild = charclass((0x01, 0x29), (0x2B, 0x3E), (0x40, 0xFF))
-noesc = charclass((0x01, 0x5B), (0x5D, 0xFF))
-mask = Optional(wildone ^ wildmany) + \
-    ZeroOrMore(nowild ^ (noesc + wildone) ^ (noesc + wildmany))
+wildone = Rule(lambda: Literal('?'))
+wildmany = Rule(lambda: Literal('*'))
+nowild = Rule(lambda: charclass((0x01, 0x29), (0x2B, 0x3E), (0x40, 0xFF)))
+noesc = Rule(lambda: charclass((0x01, 0x5B), (0x5D, 0xFF)))
+
+
+@rule
+def mask():
+    return Optional(wildone() ^ wildmany()) + \
+        ZeroOrMore(nowild() ^ (noesc() + wildone()) ^
+                   (noesc() + wildmany()))
 
 # Fall back to regex for parsing wildcards
 matchone = '[%s-%s]' % (chr(0x01), chr(0xFF))
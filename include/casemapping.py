@@ -0,0 +1,31 @@
+"""
+RFC 1459 casemapping.
+
+Nicknames and channel names are compared case-insensitively, where the
+characters {}|^ are the lower case versions of []\\~ (RFC 2812, 2.2).
+fold() maps a name to its lower case form, which is used as the key the
+name is stored and looked up under.
+"""
+
+import string
+
+UPPER = string.ascii_uppercase + '[]\\~'
+LOWER = string.ascii_lowercase + '{}|^'
+
+# A str.translate table, like str.maketrans(UPPER, LOWER) builds on Python 3
+TABLE = dict(zip(map(ord, UPPER), map(ord, LOWER)))
+
+
+def fold(name):
+    """
+    The RFC 1459 lower case form of name. Names that are lower case
+    already are returned as they are, so they aren't stored twice.
+    """
+    folded = name.translate(TABLE)
+    if folded == name:
+        return name
+    return folded
+
+
+def equal(a, b):
+    return fold(a) == fold(b)
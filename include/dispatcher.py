@@ -27,7 +27,7 @@ class Dispatcher:
 
     def dispatch(self, socket, message):
         actor = Actor.by_socket(socket)
-        message.target = config.get('server', 'servername')
+        message.target = config.snapshot.servername
         if message.command not in self.handlers:
             try:
                 self.register(message.command)
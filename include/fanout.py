@@ -0,0 +1,135 @@
+"""
+Write messages to their recipients without holding up the event loop.
+
+Messages to a few recipients are written right away. A message to a large
+ActorCollection is queued instead, and written by a worker greenlet in
+chunks: after each chunk, the worker flushes the recipients it wrote and
+yields to the event loop. Messages to recipients of a queued message are
+queued behind it, so each recipient gets messages in the order they were
+sent.
+
+Writing a message to a recipient is cheap; waking up its writer greenlet,
+which then sends it, costs much more, and that happens after the chunk.
+So chunks aren't timed, they're sized: the worker measures how long a chunk
+took together with the work it caused until the worker ran again, and
+sizes the next chunk to take about the budget.
+"""
+
+from collections import deque
+import time
+
+import gevent
+from pydispatch import dispatcher
+
+from config import config
+from models import ActorCollection
+
+# Collections with at most this many members are written in one go
+INLINE_SIZE = 256
+# Recipients written in the first chunk, and the fewest in any chunk
+MIN_CHUNK = 64
+# Seconds the worker sleeps between chunks
+YIELD_DELAY = 0.00001
+
+budget = None
+
+
+def configure_budget():
+    global budget
+    budget = config.snapshot.fanout_chunk_ms / 1000.0
+configure_budget()
+dispatcher.connect(configure_budget, 'server.fanout_chunk_ms', 'config')
+
+
+class FanOut(object):
+    def __init__(self):
+        # Queued (message, target, iterator over the recipients not yet
+        # written); a callable instead of a message is called when reached
+        self.queue = deque()
+        self.worker = None
+        # Recipients written in the next chunk
+        self.chunk_size = MIN_CHUNK
+
+    def is_large(self, target):
+        return budget > 0 and isinstance(target, ActorCollection) \
+            and len(target.children) > INLINE_SIZE
+
+    def is_pending(self, target):
+        "Whether a queued message is still to be written to any of target"
+        for _, queued, _ in self.queue:
+            if any(actor in queued for actor in target):
+                return True
+        return False
+
+    def write(self, target, message):
+        """
+        Write message to target, or queue it. Returns True if it was
+        written, then the caller is responsible for flushing target.
+        """
+        if not self.is_large(target) and not self.is_pending(target):
+            target.write(message)
+            return True
+        self.queue.append((message, target, iter(target)))
+        self.start()
+        return False
+
+    def call(self, target, function, *args):
+        "Call function once everything queued for target is written"
+        if not self.is_pending(target):
+            function(*args)
+            return
+        self.queue.append((function, target, args))
+        self.start()
+
+    def start(self):
+        if self.worker is None:
+            self.worker = gevent.spawn(self.run)
+
+    def run(self):
+        try:
+            while self.queue:
+                start = time.time()
+                count = self.run_chunk(self.chunk_size)
+                # The writers woken up run now, with everything else ready.
+                # A timer rather than sleep(0): callbacks run back to back
+                # for up to gevent's switch interval before the loop polls
+                # for input, which would hold other clients back
+                gevent.sleep(YIELD_DELAY)
+                self.resize(count, time.time() - start)
+        finally:
+            self.worker = None
+
+    def resize(self, count, elapsed):
+        "Size the next chunk from the time the last one, of count, took"
+        if count == 0:
+            return
+        size = int(budget * count / max(elapsed, 1e-6))
+        # Halfway to the new size, so that one slow round doesn't swing it
+        self.chunk_size = max(MIN_CHUNK, (self.chunk_size + size) // 2)
+
+    def run_chunk(self, size):
+        """
+        Write queued messages to up to size recipients, flush them, and
+        return how many were written
+        """
+        written = set()
+        count = 0
+        while self.queue and count < size:
+            message, _, recipients = self.queue[0]
+            if callable(message):
+                self.queue.popleft()
+                message(*recipients)
+                continue
+            for actor in recipients:
+                actor.write(message)
+                written.add(actor)
+                count += 1
+                if count == size:
+                    break
+            else:
+                self.queue.popleft()
+                continue
+            break
+        for actor in written:
+            actor.flush()
+        return count
@@ -0,0 +1,69 @@
+"""
+Split the stream received from a client into lines.
+
+Data is received into a buffer shared by all readers of the same receive
+size, and every complete line in it is split out in one pass. Sharing is
+safe because the data is copied out of it before anything else runs. No
+more than MAX_LENGTH bytes of an unfinished line are kept: the beginning
+of an over-long line is passed on, so that parsing rejects it, and the
+rest of it is discarded as it arrives.
+"""
+
+import socket as _socket
+
+MAX_LENGTH = 512
+RECV_SIZE = 4096
+
+# Receive size -> the buffer shared by the readers using that size
+chunks = {}
+
+
+class LineReader(object):
+    __slots__ = ('socket', 'max_length', 'chunk', 'buffer', 'discarding')
+
+    def __init__(self, socket, max_length=MAX_LENGTH, recv_size=RECV_SIZE):
+        self.socket = socket
+        self.max_length = max_length
+        if recv_size not in chunks:
+            chunks[recv_size] = bytearray(recv_size)
+        self.chunk = chunks[recv_size]
+        self.buffer = bytearray()
+        # Inside an over-long line that was already passed on
+        self.discarding = False
+
+    def feed(self, data):
+        "Add received data to the buffer, return the completed lines"
+        scan = len(self.buffer)
+        self.buffer += data
+        lines = []
+        start = 0
+        while True:
+            end = self.buffer.find(b'\n', scan)
+            if end == -1:
+                break
+            end += 1
+            if self.discarding:
+                self.discarding = False
+            else:
+                lines.append(bytes(self.buffer[start:end]))
+            start = scan = end
+        del self.buffer[:start]
+        if len(self.buffer) > self.max_length:
+            if not self.discarding:
+                lines.append(bytes(self.buffer[:self.max_length + 1]))
+                self.discarding = True
+            del self.buffer[:]
+        return lines
+
+    def read(self):
+        """
+        Wait for data, return the lines completed by it. Returns None when
+        the connection is closed.
+        """
+        try:
+            received = self.socket.recv_into(self.chunk)
+        except _socket.error:
+            return None
+        if received == 0:
+            return None
+        return self.feed(memoryview(self.chunk)[:received])
@@ -0,0 +1,54 @@
+"Bounded least-recently-used caches"
+
+from collections import OrderedDict
+from functools import wraps
+
+
+class LRUCache(object):
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            return default
+        # Re-insert to mark as most recently used
+        self.entries[key] = value
+        return value
+
+    def set(self, key, value):
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_missing = object()
+
+
+def lru_cache(size):
+    "Decorator caching the results of a single argument function"
+    def decorator(f):
+        cache = LRUCache(size)
+
+        @wraps(f)
+        def wrapper(arg):
+            value = cache.get(arg, _missing)
+            if value is _missing:
+                value = f(arg)
+                cache.set(arg, value)
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorator
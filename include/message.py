@@ -1,46 +1,187 @@
+import sys
+
 from config import config
-from . import abnf
+from . import parser
+
+ENCODING = 'utf-8'
+CRLF = b'\r\n'
+# Relayed parameters are memoryviews of the received line, which can only
+# be joined with bytes from Python 3
+RELAY_VIEWS = sys.version_info[0] >= 3
 
 
 class Error(Exception):
     pass
 
 
+def encode(string):
+    if isinstance(string, bytes):
+        return string
+    if isinstance(string, memoryview):
+        return string if RELAY_VIEWS else string.tobytes()
+    return string.encode(ENCODING)
+
+
 class Message(object):
+    __slots__ = ('command', 'target', 'add_nick', '_prefix', '_parameters',
+                 '_raw_parameters', '_head', '_params', '_wire')
+
     def __init__(self, target, command, *parameters, **kwargs):
         for parameter in parameters[:-1]:
             if ' ' in parameter:
                 raise Error('Space can only appear in the very last parameter')
         self.command = command
-        self.parameters = [x for x in parameters if x is not None]
+        self._raw_parameters = None
+        self._parameters = [x for x in parameters if x is not None]
         self.target = target
         self.prefix = str(kwargs['prefix']) if 'prefix' in kwargs else None
         self.add_nick = kwargs['add_nick'] if 'add_nick' in kwargs else False
 
+    def invalidate(self):
+        """
+        Drop the cached wire form. Setting prefix or parameters does this,
+        changing the message in any other way must be followed by a call.
+        """
+        self._head = None
+        self._params = None
+        self._wire = None
+
+    @property
+    def prefix(self):
+        return self._prefix
+
+    @prefix.setter
+    def prefix(self, prefix):
+        self._prefix = prefix
+        self.invalidate()
+
+    @property
+    def parameters(self):
+        return self.get_parameters()
+
+    def get_parameters(self, opaque_from=None):
+        """
+        Parameters of parsed messages are only split on first access. For
+        messages parsed from bytes, opaque_from is passed on to
+        parser.split_params_bytes on that first access.
+        """
+        if self._parameters is None:
+            if isinstance(self._raw_parameters, tuple):
+                self._parameters = parser.split_params_bytes(
+                    self._raw_parameters, opaque_from)
+            else:
+                self._parameters = parser.split_params(self._raw_parameters)
+        return self._parameters
+
+    @parameters.setter
+    def parameters(self, parameters):
+        self._raw_parameters = None
+        self._parameters = parameters
+        self.invalidate()
+
     @staticmethod
     def from_string(string):
         if len(string) > 512:
             raise Error('Message must not be longer than 512 characters')
+        if config.snapshot.engine == 'abnf':
+            return Message.from_string_abnf(string)
+        raw = parser.parse(string)
+        if not raw:
+            raise Error('Failed to parse message: ' + string)
+        prefix, command, params = raw
+        if config.snapshot.lowercase_commands:
+            command = command.upper()
+        msg = Message(None, command, prefix=prefix)
+        msg._raw_parameters = params
+        msg._parameters = None
+        return msg
+
+    @staticmethod
+    def from_bytes(line):
+        "Parse a line received from a client"
+        if len(line) > 512:
+            raise Error('Message must not be longer than 512 characters')
+        if config.snapshot.engine == 'abnf':
+            return Message.from_string_abnf(parser.decode(line))
+        raw = parser.parse_bytes(line)
+        if not raw:
+            raise Error('Failed to parse message: ' + parser.decode(line))
+        prefix, command, params = raw
+        if config.snapshot.lowercase_commands:
+            command = command.upper()
+        msg = Message(None, command, prefix=prefix)
+        msg._raw_parameters = params
+        msg._parameters = None
+        return msg
+
+    @staticmethod
+    def from_string_abnf(string):
+        "Reference implementation of from_string, using the pyparsing grammar"
+        # Imported here to keep pyparsing off the startup path
+        from . import abnf
         raw = abnf.parse(string, abnf.message)
         if not raw:
             raise Error('Failed to parse message: ' + string)
-        if config.get('parser', 'lowercase_commands'):
+        if config.snapshot.lowercase_commands:
             raw[1] = raw[1].upper()
-        msg = Message(None, prefix=raw.pop(0), *raw)
+        # Pop the prefix first: *raw is unpacked before keyword arguments
+        prefix = raw.pop(0)
+        msg = Message(None, prefix=prefix, *raw)
         return msg
 
-    def __str__(self):
-        params = self.parameters[:]
+    def format_head(self):
+        return '{prefix}{command} '.format(
+            prefix=':%s ' % self.prefix if self.prefix is not None else '',
+            command=str(self.command)
+        )
+
+    def encode_params(self):
+        params = self.parameters
         for param in params[:-1]:
             if param is not None and ' ' in param:
                 raise Error('Space can only appear in the very last parameter')
-        if len(params) > 0 and ' ' in params[-1]:
-            params[-1] = ':%s' % params[-1]
-        return '{prefix}{command} {params}\r\n'.format(
-            prefix=':%s ' % self.prefix if self.prefix is not None else '',
-            command=str(self.command),
-            params=' '.join(params)
-        )
+        parts = [encode(param) for param in params]
+        if parts:
+            last = params[-1]
+            # Relayed trailing parameters are always sent as trailing
+            if isinstance(last, memoryview) or ' ' in last or \
+                    last.startswith(':') or last == '':
+                parts[-1] = b':' + parts[-1]
+        return b' '.join(parts)
+
+    def serialize(self):
+        self._head = encode(self.format_head())
+        self._params = self.encode_params()
+
+    def wire(self):
+        "The encoded message, serialized only once"
+        if self._wire is None:
+            if self._head is None:
+                self.serialize()
+            self._wire = self._head + self._params + CRLF
+        return self._wire
+
+    def wire_for(self, nick):
+        """
+        The encoded message with nick inserted as the first parameter, as
+        sent to each recipient of numeric replies
+        """
+        if self._head is None:
+            self.serialize()
+        if self._params:
+            return b''.join([self._head, encode(nick), b' ', self._params,
+                             CRLF])
+        return b''.join([self._head, encode(nick), CRLF])
+
+    def __str__(self):
+        if self._parameters is None and \
+                isinstance(self._raw_parameters, tuple):
+            # Logging a received message doesn't split its parameters
+            line, start, end = self._raw_parameters
+            return self.format_head() + \
+                parser.decode(line[start + 1:end]) + '\r\n'
+        return self.format_head() + \
+            parser.decode(self.encode_params()) + '\r\n'
 
     def __repr__(self):
         return "'%s'" % str(self)[:-2]
@@ -0,0 +1,80 @@
+"""
+The message of the day, sent to every client that registers.
+
+motd_file is read once, and the RPL_MOTDSTART, RPL_MOTD and RPL_ENDOFMOTD
+replies are rendered from it into the chunks of a Block, so registering
+clients only get their nickname spliced in. The file is read again when
+its modification time or size changes, looked at once every CHECK_INTERVAL
+seconds at most, and on rehash.
+"""
+
+import os
+import time
+
+from pydispatch import dispatcher
+
+from config import config
+from include.numeric_responses import (
+    RPL_MOTDSTART, RPL_MOTD_BURST, RPL_ENDOFMOTD)
+from include.templates import Block
+
+# Seconds between two looks at the file
+CHECK_INTERVAL = 1
+
+# The (modification time, size) of the file the chunks were rendered from,
+# None if it's missing
+stat = None
+chunks = None
+checked_at = 0
+
+
+def file_stat(path):
+    try:
+        result = os.stat(path)
+    except OSError:
+        return None
+    return result.st_mtime, result.st_size
+
+
+def read_lines(path):
+    try:
+        with open(path, 'r') as f:
+            return [line.strip() for line in f]
+    except IOError:
+        return []
+
+
+def load():
+    "Read the file and render the replies"
+    global stat, chunks, checked_at
+    path = config.snapshot.motd_file
+    checked_at = time.time()
+    stat = file_stat(path)
+    replies = [RPL_MOTDSTART(None)]
+    lines = read_lines(path) if stat is not None else []
+    if lines:
+        replies.append(RPL_MOTD_BURST(None, lines))
+    replies.append(RPL_ENDOFMOTD(None))
+    chunks = Block.render(replies)
+
+
+def reload():
+    "Render the replies again when they're next sent"
+    global chunks
+    chunks = None
+dispatcher.connect(reload, 'server.motd_file', 'config')
+dispatcher.connect(reload, 'server.servername', 'config')
+dispatcher.connect(reload, 'rehash', 'config')
+
+
+def motd(target):
+    "The replies sending the message of the day to target"
+    global checked_at
+    now = time.time()
+    if chunks is None:
+        load()
+    elif now - checked_at >= CHECK_INTERVAL:
+        checked_at = now
+        if file_stat(config.snapshot.motd_file) != stat:
+            load()
+    return Block(target, chunks)
@@ -1,128 +1,282 @@
-from config import config
-from .message import Message
+from .templates import Template, Reply, Burst
+from .validators import NICKLEN
 
 
-def _M(*args, **kwargs):
-    kwargs['add_nick'] = True
-    return Message(*args, **kwargs)
+_RPL_WELCOME = Template('001', ':Welcome to the Internet Relay Network {user}')
 
 
 def RPL_WELCOME(target):
-    return _M(target, '001', 'Welcome to the Internet Relay Network %s'
-                             % str(target.get_user()))
+    return Reply(_RPL_WELCOME, target, user=str(target.get_user()))
+
+
+_RPL_YOURHOST = Template(
+    '002', ':Your host is {servername} running an experimental server')
 
 
 def RPL_YOURHOST(target):
-    return _M(target, '002', 'Your host is %s running an experimental server'
-                             % config.get('server', 'servername'))
+    return Reply(_RPL_YOURHOST, target)
+
+
+_RPL_CREATED = Template('003', ':This server was created {created}')
 
 
 def RPL_CREATED(target):
-    return _M(target, '003', 'This server was created %s'
-                             % config.get('server', 'created'))
+    return Reply(_RPL_CREATED, target)
+
+
+# H = Here
+# G = Away
+# * = IRCOp
+# @ = Channel Op
+# + = Voiced
+_RPL_WHOREPLY = Template('352', '{mask} {fields}')
+# The parameters of RPL_WHOREPLY after the mask, which only depend on the
+# user
+_WHOREPLY_FIELDS = Template(
+    '352', '{username} {hostname} {server} {nickname} {flags} :0 {realname}')
+
+
+def _whoreply_fields(user):
+    """
+    The encoded parameters of RPL_WHOREPLY after the mask, cached on the
+    user as long as the values they're made of don't change
+    """
+    key = (user.nickname, user.username, user.hostname, user.servername,
+           user.away, user.realname)
+    cached = user.who_fields
+    if cached is None or cached[0] != key:
+        cached = user.who_fields = (key, _WHOREPLY_FIELDS.render_params({
+            'username': user.username, 'hostname': user.hostname,
+            'server': user.servername, 'nickname': user.nickname,
+            # TODO: more flags, if needed
+            'flags': 'G' if user.away else 'H',
+            'realname': user.realname
+        }))
+    return cached[1]
 
 
 def RPL_WHOREPLY(target, user, mask):
-    # H = Here
-    # G = Away
-    # * = IRCOp
-    # @ = Channel Op
-    # + = Voiced
-    return _M(
-        target, '352', mask, user.username, user.hostname,
-        config.get('server', 'servername'), user.nickname,
-        # TODO: more flags, if needed
-        'G' if user.away else 'H', '0 ' + user.realname)
+    return Reply(_RPL_WHOREPLY, target, mask=mask,
+                 fields=_whoreply_fields(user))
+
+
+def RPL_WHOREPLY_BURST(target, users, mask):
+    "One RPL_WHOREPLY for each of users, rendered into one buffer"
+    return Burst(_RPL_WHOREPLY, target,
+                 [{'mask': mask, 'fields': _whoreply_fields(user)}
+                  for user in users])
+
+
+_RPL_ENDOFWHO = Template('315', '{mask} :End of WHO list')
 
 
 def RPL_ENDOFWHO(target, mask):
-    return _M(target, '315', mask, 'End of WHO list')
+    return Reply(_RPL_ENDOFWHO, target, mask=mask)
+
+
+_RPL_STATSLINKINFO = Template(
+    '211', '{linkname} {sendq} {sent_messages} {sent_kbytes} '
+           '{received_messages} {received_kbytes} {time_open}')
+
+
+def RPL_STATSLINKINFO(target, actor, now):
+    return Reply(_RPL_STATSLINKINFO, target,
+                 linkname=str(actor.get_user()), sendq=str(actor.sendq_size),
+                 sent_messages=str(actor.sent_messages),
+                 sent_kbytes=str(actor.sent_bytes // 1024),
+                 received_messages=str(actor.received_messages),
+                 received_kbytes=str(actor.received_bytes // 1024),
+                 time_open=str(int(now - actor.connected_at)))
+
+
+_RPL_STATSDEBUG = Template(
+    '249', '{query} :{model} {live} live, {created_count} created, '
+           '{destroyed_count} destroyed')
+
+
+def RPL_STATSDEBUG(target, query, model, counter):
+    return Reply(_RPL_STATSDEBUG, target, query=query, model=model,
+                 live=str(counter.live),
+                 created_count=str(counter.created),
+                 destroyed_count=str(counter.destroyed))
+
+
+_RPL_ENDOFSTATS = Template('219', '{query} :End of STATS report')
+
+
+def RPL_ENDOFSTATS(target, query):
+    return Reply(_RPL_ENDOFSTATS, target, query=query)
+
+
+_RPL_NOTOPIC = Template('331', '{channel} :No topic is set')
 
 
 def RPL_NOTOPIC(target, channel):
-    return _M(target, '331', str(channel), 'No topic is set')
+    return Reply(_RPL_NOTOPIC, target, channel=str(channel))
+
 
+_RPL_TOPIC = Template('332', '{channel} :{topic}')
 
-def RPL_TOPIC(target, channel, **kwargs):
-    return _M(target, '332', str(channel), channel.topic, **kwargs)
+
+def RPL_TOPIC(target, channel):
+    return Reply(_RPL_TOPIC, target, channel=str(channel), topic=channel.topic)
+
+
+_RPL_NAMEREPLY = Template('353', '{prefix} {channel} :{nicks}')
 
 
 def RPL_NAMEREPLY(target, channel):
+    "As many RPL_NAMEREPLY lines as the members need"
     # TODO: choose prefix based on channel mode
     prefix = '='
     # TODO: add user prefix if needed
-    nicks = ' '.join(channel_user.nickname for channel_user in channel.users)
-    return _M(target, '353', prefix, str(channel), nicks)
+    values = {'prefix': prefix, 'channel': str(channel)}
+    width = _RPL_NAMEREPLY.room('nicks', values, NICKLEN)
+    return Burst(_RPL_NAMEREPLY, target,
+                 [dict(values, nicks=nicks) for nicks in channel.names(width)])
+
 
+_RPL_ENDOFNAMES = Template('366', '{channel} :End of NAMES list')
 
-def RPL_ENDOFNAMES(target):
-    return _M(target, '366', 'End of NAMES list')
+
+def RPL_ENDOFNAMES(target, channel):
+    return Reply(_RPL_ENDOFNAMES, target, channel=str(channel))
+
+
+_RPL_MOTDSTART = Template('375', ':- {servername} Message of the day - ')
 
 
 def RPL_MOTDSTART(target):
-    return _M(target, '375', '- %s Message of the day - '
-    % config.get('server', 'servername'))
+    return Reply(_RPL_MOTDSTART, target)
+
+
+_RPL_MOTD = Template('372', ':- {text}')
 
 
 def RPL_MOTD(target, text):
-    return _M(target, '372', '- %s' % text)
+    return Reply(_RPL_MOTD, target, text=text)
+
+
+def RPL_MOTD_BURST(target, lines):
+    "One RPL_MOTD for each of lines, rendered into one buffer"
+    return Burst(_RPL_MOTD, target, [{'text': line} for line in lines])
+
+
+_RPL_ENDOFMOTD = Template('376', ':End of MOTD command')
 
 
 def RPL_ENDOFMOTD(target):
-    return _M(target, '376', 'End of MOTD command')
+    return Reply(_RPL_ENDOFMOTD, target)
+
+
+_RPL_REHASHING = Template('382', '{file} :Rehashing')
+
+
+def RPL_REHASHING(target, file):
+    return Reply(_RPL_REHASHING, target, file=file)
+
+
+_ERR_NOSUCHNICK = Template('401', '{nickname} :No such nick/channel')
 
 
 def ERR_NOSUCHNICK(nickname, target):
-    return _M(target, '401', nickname, 'No such nick/channel')
+    return Reply(_ERR_NOSUCHNICK, target, nickname=nickname)
+
+
+_ERR_NOSUCHCHANNEL = Template('401', '{channel} :No such channel')
 
 
 def ERR_NOSUCHCHANNEL(channel_name, target):
-    return _M(target, '401', channel_name, 'No such channel')
+    return Reply(_ERR_NOSUCHCHANNEL, target, channel=channel_name)
+
+
+_ERR_NOSUCHSERVER = Template('402', '{server} :No such server')
 
 
 def ERR_NOSUCHSERVER(server, target):
-    return _M(target, '402', server, 'No such server')
+    return Reply(_ERR_NOSUCHSERVER, target, server=server)
+
+
+_ERR_CANNOTSENDTOCHAN = Template('404', '{channel} :Cannot send to channel')
 
 
 def ERR_CANNOTSENDTOCHAN(channelname, target):
-    return _M(target, '404', channelname, 'Cannot send to channel')
+    return Reply(_ERR_CANNOTSENDTOCHAN, target, channel=channelname)
+
+
+_ERR_NORECIPIENT = Template('411', ':No recipient given {command}')
 
 
 def ERR_NORECIPIENT(command, target):
-    return _M(target, '411', 'No recipient given ' + command)
+    return Reply(_ERR_NORECIPIENT, target, command=command)
+
+
+_ERR_NOTEXTTOSEND = Template('412', ':No text to send')
 
 
 def ERR_NOTEXTTOSEND(target):
-    return _M(target, '412', 'No text to send')
+    return Reply(_ERR_NOTEXTTOSEND, target)
+
+
+_ERR_NONICKNAMEGIVEN = Template('431', ':No nickname given')
 
 
 def ERR_NONICKNAMEGIVEN(target):
-    return _M(target, '431', 'No nickname given')
+    return Reply(_ERR_NONICKNAMEGIVEN, target)
+
+
+_ERR_ERRONEUSNICKNAME = Template('432', '{nickname} :Erroneous nickname')
 
 
 def ERR_ERRONEUSNICKNAME(nickname, target):
-    return _M(target, '432', nickname, 'Erroneous nickname')
+    return Reply(_ERR_ERRONEUSNICKNAME, target, nickname=nickname)
+
+
+_ERR_NICKNAMEINUSE = Template('433', '{nickname} :Nickname is already in use')
 
 
 def ERR_NICKNAMEINUSE(nickname, target):
-    return _M(target, '433', nickname, 'Nickname is already in use')
+    return Reply(_ERR_NICKNAMEINUSE, target, nickname=nickname)
+
+
+_ERR_NICKCOLLISION = Template('436', '{nickname} :Nickname collision KILL')
 
 
 def ERR_NICKCOLLISION(nickname, target):
-    return _M(target, '436', nickname, 'Nickname collision KILL')
+    return Reply(_ERR_NICKCOLLISION, target, nickname=nickname)
+
+
+_ERR_NOTONCHANNEL = Template('442', "{channel} :You're not on that channel")
 
 
 def ERR_NOTONCHANNEL(channel, target):
-    return _M(target, '442', channel, "You're not on that channel")
+    return Reply(_ERR_NOTONCHANNEL, target, channel=channel)
+
+
+_ERR_NOTREGISTERED = Template('451', ':You have not registered')
 
 
 def ERR_NOTREGISTERED(target):
-    return _M(target, '451', 'You have not registered')
+    return Reply(_ERR_NOTREGISTERED, target)
+
+
+_ERR_NEEDMOREPARAMS = Template('461', '{command} :Not enough parameters')
 
 
 def ERR_NEEDMOREPARAMS(command, target):
-    return _M(target, '461', command, 'Not enough parameters')
+    return Reply(_ERR_NEEDMOREPARAMS, target, command=command)
+
+
+_ERR_ALREADYREGISTRED = Template('462', ':You may not reregister')
 
 
 def ERR_ALREADYREGISTRED(target):
-    return _M(target, '462', 'You may not reregister')
+    return Reply(_ERR_ALREADYREGISTRED, target)
+
+
+_ERR_NOPRIVILEGES = Template(
+    '481', ":Permission Denied- You're not an IRC operator")
+
+
+def ERR_NOPRIVILEGES(target):
+    return Reply(_ERR_NOPRIVILEGES, target)
@@ -0,0 +1,44 @@
+"A set that remembers the order items were added in"
+
+import sys
+from collections import OrderedDict
+
+# Plain dicts keep insertion order from Python 3.7, and are smaller
+ordered_dict = dict if sys.version_info >= (3, 7) else OrderedDict
+
+
+class OrderedSet(object):
+    __slots__ = ('items',)
+
+    def __init__(self, items=()):
+        self.items = ordered_dict((item, None) for item in items)
+
+    def add(self, item):
+        self.items[item] = None
+
+    def discard(self, item):
+        self.items.pop(item, None)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        if isinstance(other, OrderedSet):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'OrderedSet(%r)' % list(self)
@@ -0,0 +1,178 @@
+"""
+Fast-path parser for incoming messages.
+
+Accepts exactly the same lines as the pyparsing `message` grammar in
+include/abnf.py, and produces the same fields, but uses one precompiled
+regular expression. Parameters are only validated here; splitting them
+into a list is left to split_params, called when a handler asks for them.
+
+Lines received from clients are parsed as bytes by parse_bytes, with the
+same rules applied to bytes instead of characters.
+"""
+
+import re
+
+from pydispatch import dispatcher
+
+from config import config
+
+ENCODING = 'utf-8'
+# For clients that don't send UTF-8; any byte sequence decodes as latin-1
+FALLBACK_ENCODING = 'latin-1'
+
+
+def charclass(*classes):
+    "Helper, builds the body of a regex character class from ranges"
+    return ''.join('\\x%02x-\\x%02x' % (min, max) for (min, max) in classes)
+
+###
+# Character classes. Like in abnf.py, only characters up to 0xFF are
+# accepted.
+###
+letter = charclass((0x41, 0x5A), (0x61, 0x7A))
+digit = charclass((0x30, 0x39))
+hexdigit = charclass((0x30, 0x39), (0x41, 0x46))
+special = charclass((0x5B, 0x60), (0x7B, 0x7D))
+nospcrlfcl = charclass(
+    (0x01, 0x09),
+    (0x0B, 0x0C),
+    (0x0E, 0x1F),
+    (0x21, 0x39),
+    (0x3B, 0xFF)
+)
+trailingchar = charclass((0x01, 0x09), (0x0B, 0x0C), (0x0E, 0xFF))
+userchar = charclass(
+    (0x01, 0x09),
+    (0x0B, 0x0C),
+    (0x0E, 0x1F),
+    (0x21, 0x3F),
+    (0x41, 0xFF)
+)
+
+###
+# Rules
+###
+shortname = '[%s%s][%s%s-]*' % (letter, digit, letter, digit)
+hostname = '%s(?:\\.%s)*' % (shortname, shortname)
+servername = hostname
+
+ip4addr = '(?:[%s]{1,3}\\.){3}[%s]{1,3}' % (digit, digit)
+ip6addr = '0:0:0:0:0:(?:0|FFFF):%s|[%s]+(?::[%s]+){7}' % (
+    ip4addr, hexdigit, hexdigit)
+hostaddr = '%s|%s' % (ip4addr, ip6addr)
+host = '%s|%s' % (hostname, hostaddr)
+
+user = '[%s]+' % userchar
+nickname = '[%s%s][%s%s%s-]{0,8}' % (letter, special, letter, digit, special)
+
+prefix = '%s|%s(?:!%s)?@(?:%s)' % (servername, nickname, user, host)
+command = '[%s]+|[%s]{3}' % (letter, digit)
+
+middle = '[%s][%s:]*' % (nospcrlfcl, nospcrlfcl)
+trailing = '[%s]*' % trailingchar
+# pyparsing picks the longest alternative, so the 14 middle form goes first
+params = '(?: %s){14}(?: :?%s)?|(?: %s){0,14}(?: :%s)?' % (
+    middle, trailing, middle, trailing)
+
+message = None
+message_bytes = None
+
+
+def build_message():
+    global message, message_bytes
+    pattern = '(?::(?P<prefix>%s) )?(?P<command>%s)(?P<params>%s)' % (
+        prefix, command, params)
+    if config.snapshot.trailing_spaces:
+        pattern += ' *'
+    if config.snapshot.soft_eol:
+        pattern += '(?:\r\n|\r|\n)'
+    else:
+        pattern += '\r\n'
+    # Whitespace after the end of line is skipped, same as with pyparsing
+    pattern += '[ \t\r\n]*\\Z'
+    message = re.compile(pattern)
+    message_bytes = re.compile(pattern.encode('latin-1'))
+build_message()
+dispatcher.connect(build_message, 'parser.trailing_spaces', 'config')
+dispatcher.connect(build_message, 'parser.soft_eol', 'config')
+
+
+def parse(string):
+    """
+    Public API. Returns (prefix, command, params), where params is the raw,
+    already validated parameter string to be passed to split_params.
+    Returns False if the message is invalid.
+    """
+    # pyparsing expands tabs before parsing, and so must we to be compatible
+    if '\t' in string:
+        string = string.expandtabs()
+    match = message.match(string)
+    if match is None:
+        return False
+    return (match.group('prefix') or '',
+            match.group('command'),
+            match.group('params'))
+
+
+def split_params(params):
+    "Split a raw parameter string returned by parse into a list"
+    if not params:
+        return ['']
+    parts = params[1:].split(' ', 14)
+    for idx, part in enumerate(parts):
+        if part.startswith(':'):
+            return parts[:idx] + [' '.join(parts[idx:])[1:]]
+    return parts
+
+
+def decode(data):
+    "Decode received text, falling back to latin-1 for non-UTF-8 clients"
+    try:
+        return data.decode(ENCODING)
+    except UnicodeDecodeError:
+        return data.decode(FALLBACK_ENCODING)
+
+
+def parse_bytes(line):
+    """
+    Like parse, for a line received as bytes. The prefix and command are
+    decoded, params is a (line, start, end) tuple to be passed to
+    split_params_bytes.
+    """
+    if b'\t' in line:
+        line = line.expandtabs()
+    match = message_bytes.match(line)
+    if match is None:
+        return False
+    prefix = match.group('prefix')
+    start, end = match.span('params')
+    return (decode(prefix) if prefix is not None else '',
+            match.group('command').decode('ascii'),
+            (line, start, end))
+
+
+def split_params_bytes(params, opaque_from=None):
+    """
+    Split the parameters returned by parse_bytes into a list. Middle
+    parameters are decoded. So is the trailing parameter, unless its index
+    is at least opaque_from: then it's returned as a memoryview of the
+    received line, to be relayed without decoding and encoding it again.
+    """
+    line, pos, end = params
+    ret = []
+    while pos < end:
+        if len(ret) == 14 or line[pos + 1:pos + 2] == b':':
+            start = pos + 1
+            if line[start:start + 1] == b':':
+                start += 1
+            if opaque_from is not None and len(ret) >= opaque_from:
+                ret.append(memoryview(line)[start:end])
+            else:
+                ret.append(decode(line[start:end]))
+            return ret
+        space = line.find(b' ', pos + 1, end)
+        if space == -1:
+            space = end
+        ret.append(decode(line[pos + 1:space]))
+        pos = space
+    return ret or ['']
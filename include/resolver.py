@@ -0,0 +1,206 @@
+"""
+Look up the hostnames of clients, and optionally their ident user ids.
+
+The lookups for a client start as soon as it connects, in greenlets of
+their own, so they run while the client sends NICK and USER. USER waits
+for whatever is left of them, until lookup_timeout_ms after the connection
+was accepted. The hostname of a client is the name the PTR record of its
+address gives, if that name resolves back to the address; otherwise, or if
+the lookup isn't done in time, the address is used.
+
+Hostnames, and failures to find one, are cached by address for
+dns_cache_ttl and dns_negative_ttl seconds, in an LRU cache of at most
+dns_cache_size addresses. Concurrent lookups of one address share a single
+query, so a reconnect storm from one network resolves each address once.
+
+The ident lookup (RFC 1413) is only made if ident is enabled. Clients whose
+ident server doesn't answer get their USER username prefixed with '~'.
+"""
+
+import time
+
+import gevent
+from gevent.event import AsyncResult
+from gevent.socket import create_connection
+from pydispatch import dispatcher
+
+from config import config
+from include import validators
+from include.lru import LRUCache
+from include.parser import decode
+
+IDENT_PORT = 113
+# Longest ident reply read
+IDENT_REPLY_LENGTH = 1000
+
+timeout = None
+cache_ttl = None
+negative_ttl = None
+ident_enabled = None
+# address -> (time it expires, hostname or None)
+cache = None
+# address -> the greenlet looking it up
+pending = {}
+
+
+def configure_lookups():
+    global timeout, cache_ttl, negative_ttl, ident_enabled
+    timeout = config.snapshot.lookup_timeout_ms / 1000.0
+    cache_ttl = config.snapshot.dns_cache_ttl
+    negative_ttl = config.snapshot.dns_negative_ttl
+    ident_enabled = config.snapshot.ident
+configure_lookups()
+dispatcher.connect(configure_lookups, 'server.lookup_timeout_ms', 'config')
+dispatcher.connect(configure_lookups, 'server.dns_cache_ttl', 'config')
+dispatcher.connect(configure_lookups, 'server.dns_negative_ttl', 'config')
+dispatcher.connect(configure_lookups, 'server.ident', 'config')
+
+
+def configure_cache():
+    global cache
+    cache = LRUCache(config.snapshot.dns_cache_size)
+configure_cache()
+dispatcher.connect(configure_cache, 'server.dns_cache_size', 'config')
+
+
+class DNSResolver(object):
+    "Queries the system's name servers with dnspython"
+    def __init__(self):
+        self.resolver = None
+
+    def query(self, name, rdtype):
+        if self.resolver is None:
+            # Imported on first use, so that importing this module is cheap
+            from dns import resolver
+            self.resolver = resolver.Resolver()
+        self.resolver.lifetime = timeout
+        # resolve replaced query in dnspython 2
+        query = getattr(self.resolver, 'resolve', self.resolver.query)
+        return query(name, rdtype)
+
+    def ptr(self, address):
+        "The name the PTR record of address gives"
+        from dns import reversename
+        answer = self.query(reversename.from_address(address), 'PTR')
+        return answer[0].target.to_text(omit_final_dot=True)
+
+    def addresses(self, hostname, ipv6=False):
+        "The IPv4 or IPv6 addresses hostname resolves to"
+        answer = self.query(hostname.rstrip('.') + '.',
+                            'AAAA' if ipv6 else 'A')
+        return [record.address for record in answer]
+
+# Replaced with a stub in the tests
+backend = DNSResolver()
+
+
+def confirmed_hostname(address):
+    "The hostname of address if it resolves back to address, or None"
+    try:
+        hostname = backend.ptr(address)
+        if hostname and validators.is_host(hostname) and \
+                address in backend.addresses(hostname, ':' in address):
+            return hostname
+    except Exception:
+        pass
+    return None
+
+
+def resolve(address):
+    "Look up the hostname of address, and cache the answer"
+    hostname = None
+    try:
+        with gevent.Timeout(timeout, False):
+            hostname = confirmed_hostname(address)
+        ttl = cache_ttl if hostname else negative_ttl
+        cache.set(address, (time.time() + ttl, hostname))
+    finally:
+        del pending[address]
+    return hostname
+
+
+def hostname_lookup(address):
+    """
+    Something to wait on whose value is the hostname of address, or None:
+    a cached answer, or the greenlet looking address up
+    """
+    entry = cache.get(address)
+    if entry is not None and entry[0] > time.time():
+        result = AsyncResult()
+        result.set(entry[1])
+        return result
+    if address not in pending:
+        pending[address] = gevent.spawn(resolve, address)
+    return pending[address]
+
+
+def parse_ident(reply, port, local_port):
+    "The user id in an ident reply about the ports given, or None"
+    fields = decode(reply).split('\n')[0].strip().split(':', 3)
+    if len(fields) != 4 or fields[1].strip() != 'USERID':
+        return None
+    try:
+        ports = [int(field) for field in fields[0].split(',')]
+    except ValueError:
+        return None
+    userid = fields[3].strip()
+    if ports != [port, local_port] or not validators.is_user(userid):
+        return None
+    return userid
+
+
+def query_ident(socket):
+    "Ask the ident server of the client connected to socket for its user id"
+    address, port = socket.getpeername()[:2]
+    local_address, local_port = socket.getsockname()[:2]
+    connection = create_connection((address, IDENT_PORT),
+                                   source_address=(local_address, 0))
+    try:
+        # The port on the client's side first
+        connection.sendall(('%d, %d\r\n' % (port, local_port)).encode())
+        reply = b''
+        while b'\n' not in reply and len(reply) < IDENT_REPLY_LENGTH:
+            data = connection.recv(IDENT_REPLY_LENGTH)
+            if not data:
+                break
+            reply += data
+    finally:
+        connection.close()
+    return parse_ident(reply, port, local_port)
+
+
+def ident(socket):
+    "The user id of the client connected to socket, or None"
+    with gevent.Timeout(timeout, False):
+        try:
+            return query_ident(socket)
+        except Exception:
+            pass
+    return None
+
+
+class Lookup(object):
+    "The lookups made for one client"
+    __slots__ = ('address', 'deadline', 'hostname', 'ident')
+
+    def __init__(self, socket):
+        self.address = socket.getpeername()[0]
+        self.deadline = time.time() + timeout
+        self.hostname = hostname_lookup(self.address)
+        self.ident = gevent.spawn(ident, socket) if ident_enabled else None
+
+    def result(self, username):
+        """
+        (hostname, username) for the client, given the username it sent in
+        USER. Waits for the lookups until the deadline at most.
+        """
+        lookups = [self.hostname]
+        if self.ident is not None:
+            lookups.append(self.ident)
+        gevent.wait(lookups, timeout=max(0, self.deadline - time.time()))
+        hostname = self.hostname.value if self.hostname.ready() else None
+        if self.ident is not None:
+            userid = self.ident.value if self.ident.ready() else None
+            self.ident.kill(block=False)
+            username = userid if userid else '~' + username
+        return hostname or self.address, username
@@ -1,53 +1,121 @@
 import logging
-import itertools
 
+import gevent
+from pydispatch import dispatcher
 
 log = logging.getLogger(__name__)
 
 from config import config
 from commands.quit import QuitCommand
+from include.fanout import FanOut
 from include.message import Message as M
+from include.templates import Burst
+
+
+# Lines sent between two flushes while streaming
+STREAM_CHUNK = 100
 
 
 class Error(Exception):
     pass
 
 
+def iter_messages(messages):
+    "Messages from a message, or from nested lists and iterators of them"
+    if messages is None:
+        return
+    if hasattr(messages, 'wire'):
+        yield messages
+        return
+    for item in messages:
+        if hasattr(item, 'wire'):
+            yield item
+        else:
+            for message in iter_messages(item):
+                yield message
+
+
 class Router(object):
     def __init__(self, shutdown_signal):
         self.shutdown_signal = shutdown_signal
+        # Actors whose connection was dropped or that were disconnected since
+        # the disconnect queue was last processed
+        self.dropped = []
+        self.disconnected = []
+        self.scheduled = False
+        self.fanout = FanOut()
+        dispatcher.connect(self.actor_dropped, 'actor.dropped')
+        dispatcher.connect(self.actor_disconnected, 'actor.disconnected')
 
-    def send(self, messages):
-        if messages is None:
-            return
-
-        if not isinstance(messages, list):
-            messages = [messages]
-
+    def send(self, messages, requester=None):
+        """
+        Send a message, or lists and iterators of messages. Iterators are
+        consumed as they're sent: every STREAM_CHUNK lines, the written
+        targets are flushed, and this waits until the SendQ of requester,
+        the actor whose command the messages answer, is below the
+        high-water mark. Other targets are never waited for.
+        """
         actors = set()
-
-        for message in messages:
+        lines = 0
+        for message in iter_messages(messages):
             # Default prefix is the servername
             if message.prefix is None:
-                message.prefix = config.get('server', 'servername')
-            actors.add(message.target)
-            message.target.write(message)
-            log.debug('=> %s %s' % (repr(message.target), repr(message)))
+                message.prefix = config.snapshot.servername
+            if self.fanout.write(message.target, message):
+                actors.add(message.target)
+            log.debug('=> %r %r', message.target, message)
+            # A Burst is a line for each of its rows
+            lines += len(message) if isinstance(message, Burst) else 1
+            if lines >= STREAM_CHUNK:
+                lines = 0
+                for target in actors:
+                    target.flush()
+                actors = set()
+                if requester is not None:
+                    requester.wait_readable()
 
         for target in actors:
             target.flush()
 
-        for actor in itertools.chain.from_iterable(actors):
-            if actor.connection_dropped:
-                if actor.is_user():
+    def actor_dropped(self, sender):
+        self.dropped.append(sender)
+        self.schedule()
+
+    def actor_disconnected(self, sender):
+        self.disconnected.append(sender)
+        self.schedule()
+
+    def schedule(self):
+        "Process the disconnect queue once the current greenlet yields"
+        if not self.scheduled:
+            self.scheduled = True
+            # A greenlet rather than a loop callback, sending may block
+            gevent.spawn(self.process_disconnects)
+
+    def process_disconnects(self):
+        """
+        Quit all dropped users together, then close the sockets of all
+        disconnected actors. Users dropped while sending the quits are
+        handled in the next round of the loop.
+        """
+        self.scheduled = False
+        while self.dropped or self.disconnected:
+            dropped, self.dropped = self.dropped, []
+            resp = []
+            for actor in dropped:
+                if actor.disconnected:
+                    continue
+                if actor.is_user() and actor.get_user().registered.both:
                     cmd = QuitCommand()
-                    message = M(None, 'QUIT', 'Connection lost')
+                    message = M(None, 'QUIT', actor.drop_reason)
+                    resp += cmd.handle(actor, message)
                 # TODO: is_server
-                self.send(cmd.handle(actor, message))
-
-            if actor.disconnected:
-                try:
-                    actor.socket.shutdown(self.shutdown_signal)
-                except:
-                    pass
-                actor.socket.close()
+                else:
+                    actor.disconnect()
+            self.send(resp)
+
+            disconnected, self.disconnected = self.disconnected, []
+            for actor in disconnected:
+                # Don't close before queued messages are written
+                self.fanout.call(actor, actor.close,
+                                self.shutdown_signal)
@@ -0,0 +1,216 @@
+"""
+Numeric replies compiled into byte templates.
+
+A Template is split once into encoded literal chunks and named slots, with
+the servername and creation date compiled in. Replies rendered from it skip
+the generic Message serialization; a Burst renders many replies into one
+buffer without building a Message for each. A Block keeps replies that are
+the same for every recipient rendered, and only splices nicknames in.
+"""
+
+from string import Formatter
+
+from pydispatch import dispatcher
+
+from config import config
+from .message import Message, Error, encode
+from . import parser
+
+CONSTANTS = ('servername', 'created')
+# Longest line allowed, with the CRLF
+LINE_LENGTH = 512
+# Stands for the nickname of the recipient in a Block, with the space after
+# it; can't appear in a line
+NICK_PLACEHOLDER = '\0'
+
+templates = []
+
+
+class Template(object):
+    def __init__(self, code, params):
+        """
+        params is the parameter list after the nickname of the recipient,
+        in str.format syntax. The last parameter, if it's free text, must
+        be written with its ':' prefix.
+        """
+        self.code = code
+        self.params = params
+        self.compile()
+        templates.append(self)
+
+    def compile(self):
+        self.servername = config.snapshot.servername
+        constants = dict((name, getattr(config.snapshot, name))
+                         for name in CONSTANTS)
+        # List of (literal chunk, slot name or None, slot is a middle param)
+        self.chunks = []
+        literal = ''
+        trailing = False
+        for text, name, _, _ in Formatter().parse(self.params):
+            literal += text
+            trailing = trailing or ' :' in ' ' + literal
+            if name in constants:
+                literal += constants[name]
+            elif name is not None:
+                self.chunks.append((encode(literal), name, not trailing))
+                literal = ''
+        self.chunks.append((encode(literal), None, False))
+        self.head = encode(':%s %s ' % (self.servername, self.code))
+
+    def render_params(self, values):
+        parts = []
+        for literal, name, middle in self.chunks:
+            parts.append(literal)
+            if name is not None:
+                value = values[name]
+                if isinstance(value, bytes):
+                    # Encoded already, like cached parts of replies, which
+                    # may be several parameters
+                    parts.append(value)
+                    continue
+                if middle and ' ' in value:
+                    raise Error(
+                        'Space can only appear in the very last parameter')
+                parts.append(encode(value))
+        return b''.join(parts)
+
+    def render(self, nick, values):
+        "Render one reply to nick, or without a nickname if nick is None"
+        if nick is None:
+            return b''.join([self.head, self.render_params(values), b'\r\n'])
+        return b''.join([self.head, encode(nick), b' ',
+                         self.render_params(values), b'\r\n'])
+
+    def render_many(self, nick, rows):
+        "Render one reply per dict of values in rows into a single buffer"
+        if nick is None:
+            start = self.head
+        else:
+            start = b''.join([self.head, encode(nick), b' '])
+        parts = []
+        for values in rows:
+            parts.append(start)
+            parts.append(self.render_params(values))
+            parts.append(b'\r\n')
+        return b''.join(parts)
+
+    def room(self, slot, values, nick_length):
+        """
+        Bytes left for the value of slot in a line with values in the other
+        slots, sent to a recipient with a nickname of nick_length
+        """
+        values = dict(values)
+        values[slot] = b''
+        return LINE_LENGTH - len(self.render('*' * nick_length, values))
+
+    def format(self, values):
+        "The parameters as text, used to compare replies and for logging"
+        return self.render_params(values).decode('utf-8')
+
+
+def compile_templates():
+    for template in templates:
+        template.compile()
+dispatcher.connect(compile_templates, 'server.servername', 'config')
+dispatcher.connect(compile_templates, 'server.created', 'config')
+
+
+class Reply(Message):
+    "A numeric reply rendered from a Template"
+    __slots__ = ('template', 'values')
+
+    def __init__(self, template, target, **values):
+        self.template = template
+        self.values = values
+        self.target = target
+        self.command = template.code
+        self.add_nick = True
+        self._raw_parameters = None
+        self._parameters = None
+        self._prefix = template.servername
+
+    @property
+    def parameters(self):
+        if self._parameters is None:
+            self._parameters = parser.split_params(
+                ' ' + self.template.format(self.values))
+        return self._parameters
+
+    def wire(self):
+        return self.template.render(None, self.values)
+
+    def wire_for(self, nick):
+        return self.template.render(nick, self.values)
+
+    def __str__(self):
+        return self.wire().decode('utf-8', 'replace')
+
+
+class Burst(object):
+    "Many replies from one Template, rendered into one buffer"
+    add_nick = True
+
+    def __init__(self, template, target, rows):
+        self.template = template
+        self.target = target
+        self.rows = rows
+        self.prefix = template.servername
+
+    def wire(self):
+        return self.template.render_many(None, self.rows)
+
+    def wire_for(self, nick):
+        return self.template.render_many(nick, self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __str__(self):
+        return self.wire().decode('utf-8', 'replace')
+
+    def __repr__(self):
+        return "'%s'" % str(self).rstrip('\r\n').replace('\r\n', "', '")
+
+    def __eq__(self, other):
+        return isinstance(other, Burst) \
+            and self.template is other.template \
+            and self.target == other.target \
+            and self.rows == other.rows
+
+
+class Block(object):
+    "Replies rendered once, with the nickname of each recipient spliced in"
+    add_nick = True
+
+    def __init__(self, target, chunks):
+        """
+        chunks is the rendered replies split where the nickname goes, see
+        Block.render
+        """
+        self.target = target
+        self.chunks = chunks
+        self.prefix = config.snapshot.servername
+
+    @staticmethod
+    def render(replies):
+        "Render replies, like Reply and Burst, into the chunks of a Block"
+        placeholder = encode(NICK_PLACEHOLDER + ' ')
+        return b''.join(reply.wire_for(NICK_PLACEHOLDER)
+                        for reply in replies).split(placeholder)
+
+    def wire(self):
+        return b''.join(self.chunks)
+
+    def wire_for(self, nick):
+        return encode(nick + ' ').join(self.chunks)
+
+    def __str__(self):
+        return self.wire().decode('utf-8', 'replace')
+
+    def __repr__(self):
+        return "'%s'" % str(self).rstrip('\r\n').replace('\r\n', "', '")
+
+    def __eq__(self, other):
+        return isinstance(other, Block) \
+            and self.chunks == other.chunks \
+            and self.target == other.target
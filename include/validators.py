@@ -0,0 +1,71 @@
+"""
+Validate single fields of messages, such as nicknames and channel names.
+
+The RFC2812 rules are compiled into regular expressions once, and the
+results for recently seen names are kept in a small cache.
+"""
+
+import re
+
+from . import parser
+from .lru import lru_cache
+
+CACHE_SIZE = 1024
+
+chanstring = parser.charclass(
+    (0x01, 0x06),
+    (0x08, 0x09),
+    (0x0B, 0x0C),
+    (0x0E, 0x1F),
+    (0x21, 0x2B),
+    (0x2D, 0x39),
+    (0x3B, 0xFF)
+)
+channelid = '[%s%s]{5}' % (parser.charclass((0x41, 0x5A)), parser.digit)
+channel = '(?:(?P<prefix>[#+&])|(?P<safe>!)(?P<id>%s))' \
+          '(?P<name>[%s]+)(?::(?P<mask>[%s]+))?' % (
+              channelid, chanstring, chanstring)
+
+
+def anchored(rule):
+    "Compile a rule to only match complete strings"
+    return re.compile('(?:%s)\\Z' % rule)
+
+# Longest nickname parser.nickname allows
+NICKLEN = 9
+
+nickname_re = anchored(parser.nickname)
+user_re = anchored(parser.user)
+host_re = anchored(parser.host)
+channel_re = anchored(channel)
+
+
+@lru_cache(CACHE_SIZE)
+def is_nickname(string):
+    return nickname_re.match(string) is not None
+
+
+def is_user(string):
+    return user_re.match(string) is not None
+
+
+def is_host(string):
+    return host_re.match(string) is not None
+
+
+@lru_cache(CACHE_SIZE)
+def split_channel(string):
+    """
+    Split a channel name into (prefix, id, name). id is None unless the
+    prefix is '!'. Returns None if the channel name is invalid.
+    """
+    match = channel_re.match(string)
+    if match is None:
+        return None
+    if match.group('safe'):
+        return (match.group('safe'), match.group('id'), match.group('name'))
+    return (match.group('prefix'), None, match.group('name'))
+
+
+def is_channel(string):
+    return split_channel(string) is not None
@@ -0,0 +1,103 @@
+"""
+Match strings against wildcard masks, as used by WHO.
+
+'?' matches exactly one character, '*' matches any number of characters,
+and a backslash makes the wildcard after it match literally. Masks are
+compiled into matcher functions once and kept in an LRU cache. Common
+shapes like 'nick*' and '*.example.com' are matched with plain string
+methods, everything else with a regular expression.
+"""
+
+import re
+
+from .lru import lru_cache
+
+CACHE_SIZE = 256
+
+WILDONE = object()
+WILDMANY = object()
+
+
+def tokenize(mask):
+    """
+    Split a mask into literal strings, WILDONE and WILDMANY. Adjacent
+    literal characters are merged, and so are adjacent WILDMANYs.
+    """
+    tokens = []
+    literal = []
+    escaped = False
+    for char in mask:
+        if escaped or char not in '*?\\':
+            if escaped and char not in '*?':
+                literal.append('\\')
+            literal.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        else:
+            if literal:
+                tokens.append(''.join(literal))
+                literal = []
+            wild = WILDMANY if char == '*' else WILDONE
+            if not (wild is WILDMANY and tokens and tokens[-1] is WILDMANY):
+                tokens.append(wild)
+    if escaped:
+        literal.append('\\')
+    if literal:
+        tokens.append(''.join(literal))
+    return tokens
+
+
+def untokenize(tokens):
+    "The mask that tokenize splits into tokens"
+    parts = []
+    for token in tokens:
+        if token is WILDONE:
+            parts.append('?')
+        elif token is WILDMANY:
+            parts.append('*')
+        else:
+            parts.append(token.replace('*', '\\*').replace('?', '\\?'))
+    return ''.join(parts)
+
+
+def to_regex(tokens):
+    parts = []
+    for token in tokens:
+        if token is WILDONE:
+            parts.append('.')
+        elif token is WILDMANY:
+            parts.append('.*')
+        else:
+            parts.append(re.escape(token))
+    return re.compile(''.join(parts) + '\\Z', re.DOTALL)
+
+
+def is_wild(token):
+    return token is WILDONE or token is WILDMANY
+
+
+@lru_cache(CACHE_SIZE)
+def matcher(mask):
+    "Returns a function that tells whether a string matches mask"
+    tokens = tokenize(mask)
+    wild = [is_wild(token) for token in tokens]
+    if not any(wild):
+        literal = ''.join(tokens)
+        return lambda string: string == literal
+    if wild == [True] and tokens[0] is WILDMANY:
+        return lambda string: True
+    if wild == [True, False] and tokens[0] is WILDMANY:
+        return lambda string: string.endswith(tokens[1])
+    if wild == [False, True] and tokens[1] is WILDMANY:
+        return lambda string: string.startswith(tokens[0])
+    if wild == [True, False, True] and tokens[0] is tokens[2] is WILDMANY:
+        return lambda string: tokens[1] in string
+    regex = to_regex(tokens)
+    return lambda string: regex.match(string) is not None
+
+
+def match(mask, string):
+    if string is None:
+        return False
+    return matcher(mask)(string)
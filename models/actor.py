@@ -1,17 +1,114 @@
+import time
+
+import gevent
+from gevent.event import Event
+from pydispatch import dispatcher
+
+from config import config
 from models import Error
 from models.base import BaseModel
 
+# Most buffers passed to one sendmsg call, IOV_MAX on Linux
+MAX_BUFFERS = 1024
+
+sendq_limit = None
+sendq_high_water = None
+# Seconds output may be held back while waiting for the event loop to go idle
+coalesce_delay = None
+
+
+def configure_sendq():
+    global sendq_limit, sendq_high_water, coalesce_delay
+    sendq_limit = config.snapshot.sendq_limit
+    sendq_high_water = config.snapshot.sendq_high_water
+    coalesce_delay = config.snapshot.write_coalesce_ms / 1000.0
+configure_sendq()
+dispatcher.connect(configure_sendq, 'server.sendq_limit', 'config')
+dispatcher.connect(configure_sendq, 'server.sendq_high_water', 'config')
+dispatcher.connect(configure_sendq, 'server.write_coalesce_ms', 'config')
+
+
+def send_buffers(socket, buffers):
+    "Like socket.sendall for a list of buffers, with one sendmsg per write"
+    if not hasattr(socket, 'sendmsg'):
+        socket.sendall(b''.join(buffers))
+        return
+    start = 0
+    while start < len(buffers):
+        sent = socket.sendmsg(buffers[start:])
+        while start < len(buffers) and sent >= len(buffers[start]):
+            sent -= len(buffers[start])
+            start += 1
+        if sent:
+            buffers[start] = memoryview(buffers[start])[sent:]
+
+
+class IdleGate(object):
+    """
+    Lets waiting greenlets through once the event loop is idle, or after
+    coalesce_delay. All writers share one gate, so a fan-out to many
+    actors doesn't start a timer for each of them.
+    """
+    def __init__(self):
+        self.event = None
+
+    def wait(self):
+        if self.event is None:
+            self.event = Event()
+            gevent.spawn(self.open, self.event)
+        self.event.wait()
+
+    def open(self, event):
+        with gevent.Timeout(coalesce_delay, False):
+            gevent.idle()
+        self.event = None
+        event.set()
+
+idle_gate = IdleGate()
+
 
 class Actor(BaseModel):
-    socket_to_actor = {}
+    __slots__ = ('password', 'disconnected', 'connection_dropped',
+                 'drop_reason', 'socket', 'connected_at', 'sendq',
+                 'sendq_size', 'sendq_ready', 'readable', 'writer', 'closing',
+                 'closed',
+                 'shutdown_signal', 'sent_messages', 'sent_bytes',
+                 'received_messages', 'received_bytes', 'lookup', '_server',
+                 '_user')
 
     def __init__(self, socket, **kwargs):
+        super(Actor, self).__init__()
         self.password = None
         self.disconnected = False
         self.connection_dropped = False
+        # Reason given in the QUIT sent when the connection is dropped
+        self.drop_reason = 'Connection lost'
 
         self.socket = socket
-        self.socket_file = socket.makefile('rw')
+        self.connected_at = time.time()
+        # The hostname and ident lookups started when the client connected,
+        # until USER uses them
+        self.lookup = None
+
+        # Outgoing data waits in the SendQ until the writer greenlet sends it
+        self.sendq = []
+        self.sendq_size = 0
+        # Set when the writer has something to do, created with the writer
+        self.sendq_ready = None
+        # While reading from the client isn't allowed, an Event set when it
+        # is allowed again
+        self.readable = None
+        self.writer = None
+        self.closing = False
+        # True once the socket is closed; before that, an Event set when it
+        # is, while something waits for that
+        self.closed = False
+        self.shutdown_signal = None
+
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.received_messages = 0
+        self.received_bytes = 0
 
         self._server = None
         self._user = None
@@ -54,23 +151,24 @@ class Actor(BaseModel):
             raise Error('not a server')
         return self._server
 
-    def __setattr__(self, key, value):
-        if key == 'server':
-            if self.is_user():
-                raise Error('user XOR server must be passed to Actor')
-            if value.actor:
-                raise Error('server already has an actor set')
-            self._server = value
-            self._server.actor = self
-        elif key == 'user':
-            if self.is_server():
-                raise Error('user XOR server must be passed to Actor')
-            if hasattr(value, 'actor'):
-                raise Error('user already has an actor set')
-            self._user = value
-            self._user.actor = self
-        else:
-            super(BaseModel, self).__setattr__(key, value)
+    def set_user(self, user):
+        if self.is_server():
+            raise Error('user XOR server must be passed to Actor')
+        if hasattr(user, 'actor'):
+            raise Error('user already has an actor set')
+        self._user = user
+        self._user.actor = self
+
+    def set_server(self, server):
+        if self.is_user():
+            raise Error('user XOR server must be passed to Actor')
+        if server.actor:
+            raise Error('server already has an actor set')
+        self._server = server
+        self._server.actor = self
+
+    user = property(get_user, set_user)
+    server = property(get_server, set_server)
 
     def __str__(self):
         if self.is_user():
@@ -85,23 +183,126 @@ class Actor(BaseModel):
 
     # Implement socket-like interface
     def write(self, message):
+        if self.connection_dropped:
+            return
         if self.is_user() and message.add_nick:
-            message.parameters.insert(0, self.get_user().nickname)
-        try:
-            self.socket_file.write(message)
-        except:
-            self.connection_dropped = True
-        if self.is_user() and message.add_nick:
-            message.parameters = message.parameters[1:]
+            # Nickname is not set yet during registration
+            data = message.wire_for(self.get_user().nickname or '*')
+        else:
+            data = message.wire()
+        if self.sendq_size + len(data) > sendq_limit:
+            self.drop('SendQ exceeded')
+            return
+        self.sendq.append(data)
+        self.sendq_size += len(data)
+        if self.sendq_size > sendq_high_water and self.readable is None:
+            self.readable = Event()
 
     def flush(self):
+        "Wake up the writer greenlet, starting it if needed"
+        if not self.sendq and not self.closing:
+            return
+        if self.writer is None:
+            self.sendq_ready = Event()
+            self.writer = gevent.spawn(self.run_writer)
+        self.sendq_ready.set()
+
+    def run_writer(self):
+        while True:
+            if self.sendq and coalesce_delay:
+                # Let everything else that's ready to run add to the queue
+                # first, so it's all sent together
+                idle_gate.wait()
+            while self.sendq and self.send_queued():
+                pass
+            if self.closing:
+                self.close_socket()
+                return
+            self.sendq_ready.clear()
+            self.sendq_ready.wait()
+
+    def send_queued(self):
+        "Send up to MAX_BUFFERS buffers from the SendQ in one go"
+        if len(self.sendq) <= MAX_BUFFERS:
+            buffers, self.sendq = self.sendq, []
+        else:
+            buffers = self.sendq[:MAX_BUFFERS]
+            del self.sendq[:MAX_BUFFERS]
+        size = sum(len(data) for data in buffers)
+        messages = sum(data.count(b'\n') for data in buffers)
         try:
-            self.socket_file.flush()
+            send_buffers(self.socket, buffers)
         except:
-            self.connection_dropped = True
+            self.drop('Connection lost')
+            return False
+        self.sendq_size -= size
+        self.sent_messages += messages
+        self.sent_bytes += size
+        if self.sendq_size <= sendq_high_water:
+            self.set_readable()
+        return True
+
+    def is_readable(self):
+        return self.readable is None
+
+    def set_readable(self):
+        if self.readable is not None:
+            self.readable.set()
+            self.readable = None
+
+    def wait_readable(self):
+        "Block while the SendQ is above the high-water mark"
+        if self.readable is not None:
+            self.readable.wait()
+
+    def drop(self, reason):
+        "The connection is unusable, anything still queued is discarded"
+        if self.connection_dropped:
+            return
+        self.connection_dropped = True
+        self.drop_reason = reason
+        self.sendq = []
+        self.sendq_size = 0
+        self.set_readable()
+        dispatcher.send('actor.dropped', self)
 
     def disconnect(self):
+        if self.disconnected:
+            return
         self.disconnected = True
+        dispatcher.send('actor.disconnected', self)
+
+    def close(self, shutdown_signal):
+        "Close the socket once everything queued so far has been sent"
+        if self.closing:
+            return
+        self.closing = True
+        self.shutdown_signal = shutdown_signal
+        if self.writer is None:
+            self.close_socket()
+        else:
+            self.sendq_ready.set()
+
+    def close_socket(self):
+        "Close the socket, and forget the actor"
+        try:
+            self.socket.shutdown(self.shutdown_signal)
+        except:
+            pass
+        self.socket.close()
+        if self.closed is not False:
+            self.closed.set()
+        self.closed = True
+        if self.folded_key is not None:
+            self.delete()
+
+    def wait_closed(self, timeout=None):
+        "Block until the socket is closed, or for timeout seconds at most"
+        if self.closed is True:
+            return
+        if self.closed is False:
+            self.closed = Event()
+        self.closed.wait(timeout)
 
     def __iter__(self):
         return iter([self])
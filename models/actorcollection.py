@@ -24,6 +24,16 @@ class ActorCollection(object):
                 raise Error('Don\'t know what to do with %s' + child.__class__)
         self.children = frozenset(self.children)
 
+    @classmethod
+    def of_users(cls, users):
+        "Collection of the actors of users, skipping the type checks"
+        collection = cls.__new__(cls)
+        collection.children = frozenset(user.actor for user in users)
+        return collection
+
+    def excluding(self, actor):
+        return ActorCollectionExcluding(self, actor)
+
     def write(self, message):
         for child in self.children:
             child.write(message)
@@ -33,7 +43,7 @@ class ActorCollection(object):
             child.flush()
 
     def disconnect(self):
-        for child in self.children:
+        for child in self:
             child.disconnect()
 
     def read(self):
@@ -41,17 +51,17 @@ class ActorCollection(object):
 
     def __str__(self):
         return 'ActorCollection(' +\
-               ', '.join([str(child) for child in self.children]) +\
+               ', '.join([str(child) for child in self]) +\
                ')'
 
     def __repr__(self):
         return 'ActorCollection(' +\
-               ', '.join([repr(child) for child in self.children]) +\
+               ', '.join([repr(child) for child in self]) +\
                ')'
 
     def __eq__(self, other):
         if isinstance(other, ActorCollection):
-            return all([actor in other for actor in self.children])
+            return all([actor in other for actor in self])
         else:
             return NotImplemented
 
@@ -63,3 +73,30 @@ class ActorCollection(object):
 
     def __hash__(self):
         return hash(self.children)
+
+
+class ActorCollectionExcluding(ActorCollection):
+    "All members of a collection but one, sharing the members of the original"
+    def __init__(self, collection, excluded):
+        self.children = collection.children
+        self.excluded = excluded
+
+    def write(self, message):
+        for child in self.children:
+            if child is not self.excluded:
+                child.write(message)
+
+    def flush(self):
+        for child in self.children:
+            if child is not self.excluded:
+                child.flush()
+
+    def __contains__(self, item):
+        return item is not self.excluded and item in self.children
+
+    def __iter__(self):
+        return (child for child in self.children
+                if child is not self.excluded)
+
+    def __hash__(self):
+        return hash((self.children, self.excluded))
@@ -1,14 +1,42 @@
-from models import Error
+from models import Error, lifecycle
+from models.index import Index
 
 
 class BaseModel(object):
     objects = {}
 
+    # Models are created by the thousands, so they have no __dict__.
+    # folded_key is the key the object is saved under, None while it isn't.
+    __slots__ = ('folded_key',)
+
+    def __init__(self):
+        self.folded_key = None
+
+    @classmethod
+    def indexes(cls):
+        "The Indexes declared on the class and its bases"
+        if '_indexes' not in cls.__dict__:
+            cls._indexes = [value
+                            for klass in cls.__mro__
+                            for value in vars(klass).values()
+                            if isinstance(value, Index)]
+        return cls._indexes
+
+    @staticmethod
+    def fold(key):
+        """
+        The form of key that objects are stored and looked up under.
+        Subclasses with case-insensitive keys override this.
+        """
+        return key
+
     @classmethod
     def get(cls, key):
-        if not cls.exists(key):
+        objects = BaseModel.objects.get(cls, {})
+        folded = cls.fold(key)
+        if folded not in objects:
             raise Error('%s with key %s does not exist' % (cls.__name__, key))
-        return BaseModel.objects[cls][key]
+        return objects[folded]
 
     @classmethod
     def all(cls):
@@ -18,40 +46,55 @@ class BaseModel(object):
 
     @classmethod
     def exists(cls, key):
-        return cls in BaseModel.objects and key in BaseModel.objects[cls]
+        return cls in BaseModel.objects and \
+            cls.fold(key) in BaseModel.objects[cls]
 
     def save(self):
-        exists = self.__class__.exists(self.get_key())
-        not_self = exists and self.__class__.get(self.get_key()) is not self
-        if not_self:
+        folded = self.fold(self.get_key())
+        objects = BaseModel.objects.setdefault(self.__class__, {})
+        if objects.get(folded, self) is not self:
             raise Error('%s with key %s already exists but '
                         'is not the object to be saved' % (
                         self.__class__.__name__, self.get_key()
             ))
-        if not self.__class__ in BaseModel.objects:
-            BaseModel.objects[self.__class__] = {}
-        BaseModel.objects[self.__class__][self.get_key()] = self
+        if self.folded_key is None:
+            lifecycle.counter(self.__class__).created += 1
+        elif self.folded_key != folded:
+            del objects[self.folded_key]
+        objects[folded] = self
+        # The key this object is stored under, so it isn't folded again
+        self.folded_key = folded
+        for index in self.indexes():
+            index.add(self)
 
     def delete(self):
-        del BaseModel.objects[self.__class__][self.get_key()]
+        "Forget the object; does nothing if it isn't saved"
+        if self.folded_key is None:
+            return
+        del BaseModel.objects[self.__class__][self.folded_key]
+        self.folded_key = None
+        lifecycle.counter(self.__class__).destroyed += 1
+        for index in self.indexes():
+            index.remove(self)
 
     def get_key(self):
         raise NotImplementedError
 
     def set_key(self, new_key):
-        if self.__class__.exists(new_key):
+        "Change the key; keys differing only in case are the same object"
+        existing = BaseModel.objects.get(self.__class__, {}).get(
+            self.fold(new_key))
+        if existing is not None and existing is not self:
             raise Error('%s with key %s already exists' % (
                 self.__class__.__name__, new_key))
-        if self.get_key == new_key:
-            pass
-        del BaseModel.objects[self.__class__][self.get_key()]
         old_key = self.get_key()
         self._set_key(new_key)
         if self.get_key() != new_key:
             raise Error('subclass was expected to change key from %s to %s, '
                         'but key is not %s' % (
                         old_key, new_key, self.get_key()))
-        self.save()
+        if self.folded_key is not None:
+            self.save()
 
     def _set_key(self, new_key):
         raise NotImplementedError
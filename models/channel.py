@@ -1,46 +1,169 @@
-from include import abnf
+from include import casemapping, validators
+from include.message import encode
+from include.orderedset import OrderedSet
 
 from models import Error
+from models.actorcollection import ActorCollection
 from models.base import BaseModel
+from models.flags import Flags, flag
 
 
-class ChannelMode(object):
-    def __init__(self):
-        self.distributed = True
-        self.invite_only = False
+class ChannelMode(Flags):
+    __slots__ = ()
+    attribute = 'modes'
+
+    distributed = flag(1)
+    invite_only = flag(2)
+
+
+# Members of channels larger than this aren't counted in each other's
+# neighbours maps, which would take an entry per pair of members and an
+# update per member on every JOIN and PART. User.all_neighbours adds them
+# when a NICK or QUIT needs them. A channel is counted again once it's
+# back to half this size, so members coming and going around the limit
+# don't rebuild the maps every time.
+NEIGHBOUR_LIMIT = 100
 
 
 class Channel(BaseModel):
+    fold = staticmethod(casemapping.fold)
+
+    __slots__ = ('prefix', 'id', 'name', '_modes', 'users', 'topic',
+                 'persistent', '_recipients', '_names', 'tracks_neighbours')
+
     def __init__(self, name):
-        if not self.is_valid_name(name):
+        super(Channel, self).__init__()
+        parts = validators.split_channel(name)
+        if parts is None:
             raise Error('Erroneous channel name')
 
-        raw = abnf.parse(name, abnf.channel)
-        self.mode = ChannelMode
-        self.prefix = raw[0]
-        self.id = raw[1] if self.prefix == '!' else None
-        self.name = raw[2] if self.prefix == '!' else raw[1]
+        self._names = None
+        # Flags of ChannelMode
+        self.modes = 0
+        self.mode.distributed = True
+        self.prefix, self.id, self.name = parts
 
-        self.users = []
+        self.users = OrderedSet()
         self.topic = None
+        # Persistent channels aren't deleted when the last member leaves
+        self.persistent = False
+        self._recipients = None
+        # Whether the members are counted in each other's neighbours maps
+        self.tracks_neighbours = True
+
+    @property
+    def mode(self):
+        return ChannelMode(self)
+
+    @property
+    def modes(self):
+        return self._modes
+
+    @modes.setter
+    def modes(self, modes):
+        self._modes = modes
+        self.forget_names()
 
     def __str__(self):
         return self.prefix + self.name
 
     @staticmethod
     def is_valid_name(name):
-        return bool(abnf.parse(name, abnf.channel))
+        return validators.is_channel(name)
 
     def get_key(self):
         return str(self)
 
+    @property
+    def recipients(self):
+        "Actors of the members, rebuilt only when membership changes"
+        if self._recipients is None:
+            self._recipients = ActorCollection.of_users(self.users)
+        return self._recipients
+
+    def names(self, width):
+        """
+        The nicknames of the members, encoded and space separated, in lines
+        of at most width bytes, for RPL_NAMEREPLY. Joining members are
+        added to the last line; parts, nickname and mode changes make the
+        lines be rebuilt on the next call.
+        """
+        if self._names is None or self._names[0] != width:
+            self._names = (width, split_names(
+                [encode(user.nickname) for user in self.users], width))
+        return self._names[1]
+
+    def add_name(self, user):
+        if self._names is None:
+            return
+        width, lines = self._names
+        nick = encode(user.nickname)
+        if lines and len(lines[-1]) + 1 + len(nick) <= width:
+            lines[-1] += b' ' + nick
+        else:
+            lines.append(nick)
+
+    def forget_names(self):
+        self._names = None
+
     def join(self, user):
         if user not in self.users:
-            self.users.append(user)
+            if self.tracks_neighbours and len(self.users) >= NEIGHBOUR_LIMIT:
+                self.untrack_neighbours()
+            if self.tracks_neighbours:
+                for member in self.users:
+                    member.add_neighbour(user)
+                    user.add_neighbour(member)
+            self.users.add(user)
+            self._recipients = None
+            self.add_name(user)
             user.join(self)
 
     def part(self, user):
         if user in self.users:
-            self.users.remove(user)
+            self.users.discard(user)
+            if self.tracks_neighbours:
+                for member in self.users:
+                    member.remove_neighbour(user)
+                    user.remove_neighbour(member)
+            elif len(self.users) <= NEIGHBOUR_LIMIT // 2:
+                self.track_neighbours()
+            self._recipients = None
+            self.forget_names()
             user.part(self)
+            if not self.users and not self.persistent and \
+                    self.folded_key is not None:
+                self.delete()
+
+    def track_neighbours(self):
+        "Count the members in each other's neighbours maps"
+        self.tracks_neighbours = True
+        for member in self.users:
+            for other in self.users:
+                if other is not member:
+                    member.add_neighbour(other)
+
+    def untrack_neighbours(self):
+        "Take the members out of each other's neighbours maps"
+        self.tracks_neighbours = False
+        for member in self.users:
+            for other in self.users:
+                if other is not member:
+                    member.remove_neighbour(other)
+
 
+def split_names(nicks, width):
+    "Join nicks with spaces into lines of at most width bytes"
+    lines = []
+    line = []
+    length = -1
+    for nick in nicks:
+        if line and length + 1 + len(nick) > width:
+            lines.append(b' '.join(line))
+            line = []
+            length = -1
+        line.append(nick)
+        length += 1 + len(nick)
+    if line:
+        lines.append(b' '.join(line))
+    return lines
@@ -0,0 +1,36 @@
+"""
+Boolean flags packed into an int.
+
+A Flags subclass is a view of an int attribute of its owner, with a
+property for each flag, so objects with several flags keep one int
+instead of an object with an attribute per flag:
+
+    class UserMode(Flags):
+        __slots__ = ()
+        attribute = 'modes'
+        away = flag(1)
+        invisible = flag(2)
+
+    user.mode.away = True   # sets bit 1 of user.modes
+"""
+
+
+class Flags(object):
+    __slots__ = ('owner',)
+    # Name of the int attribute of owner holding the flags
+    attribute = None
+
+    def __init__(self, owner):
+        self.owner = owner
+
+
+def flag(bit):
+    "A boolean property of a Flags subclass, stored as bit"
+    def get(self):
+        return bool(getattr(self.owner, self.attribute) & bit)
+
+    def set(self, value):
+        bits = getattr(self.owner, self.attribute)
+        setattr(self.owner, self.attribute,
+                bits | bit if value else bits & ~bit)
+    return property(get, set)
@@ -0,0 +1,143 @@
+"""
+Secondary indexes for models.
+
+An Index is declared as a class attribute of a model, naming the attribute
+it indexes:
+
+    class User(BaseModel):
+        by_hostname = Index('hostname', suffixes=True)
+
+BaseModel keeps it up to date on save, delete and set_key. Objects whose
+attribute is None aren't indexed. Besides exact lookups, wildcard masks
+are matched against the distinct values: masks starting with a literal
+prefix only look at values with that prefix. Indexes created with
+suffixes=True also keep the reversed values sorted, so that masks ending
+with a literal suffix, like '*.example.com', only look at values with that
+suffix.
+
+An Index can be given a fold function, like casemapping.fold, that values
+are indexed under; lookups and the literal parts of masks are folded the
+same way, so matching is case-insensitive.
+"""
+
+from bisect import bisect_left, insort
+
+from include import wildcard
+
+try:
+    from sys import intern
+except ImportError:
+    pass
+
+
+class Index(object):
+    def __init__(self, attribute, fold=None, suffixes=False):
+        self.attribute = attribute
+        self.fold = fold
+        self.suffixes = suffixes
+        # value -> the object with that value, or {object: None} if there
+        # are more of them, in the order they were indexed
+        self.entries = {}
+        # object -> the value it's indexed under
+        self.values = {}
+        # The distinct values sorted, and reversed and sorted if suffixes is
+        # set, for prefix and suffix queries
+        self.sorted = []
+        self.sorted_reversed = []
+
+    def add(self, obj):
+        "Index obj under the current value of the attribute"
+        value = getattr(obj, self.attribute)
+        if value is not None and self.fold is not None:
+            value = self.fold(value)
+            # Interned, so objects with the same value share the folded one.
+            # Python 2 only interns str, not the unicode decoded from clients.
+            if isinstance(value, str):
+                value = intern(value)
+        if obj in self.values:
+            if self.values[obj] == value:
+                return
+            self.remove(obj)
+        if value is None:
+            return
+        if value not in self.entries:
+            self.entries[value] = obj
+            insort(self.sorted, value)
+            if self.suffixes:
+                insort(self.sorted_reversed, value[::-1])
+        else:
+            objects = self.entries[value]
+            if not isinstance(objects, dict):
+                objects = self.entries[value] = {objects: None}
+            objects[obj] = None
+        self.values[obj] = value
+
+    def remove(self, obj):
+        if obj not in self.values:
+            return
+        value = self.values.pop(obj)
+        objects = self.entries[value]
+        if isinstance(objects, dict):
+            del objects[obj]
+            if len(objects) == 1:
+                self.entries[value], = objects
+        else:
+            del self.entries[value]
+            del self.sorted[bisect_left(self.sorted, value)]
+            if self.suffixes:
+                del self.sorted_reversed[
+                    bisect_left(self.sorted_reversed, value[::-1])]
+
+    def get(self, value):
+        "Objects with the attribute equal to value"
+        if self.fold is not None:
+            value = self.fold(value)
+        return list(self.objects(value))
+
+    def objects(self, value):
+        "Objects indexed under value, which is folded already"
+        objects = self.entries.get(value)
+        if objects is None:
+            return ()
+        if isinstance(objects, dict):
+            return objects
+        return (objects,)
+
+    @staticmethod
+    def starting_with(values, prefix):
+        "Items of the sorted list values that start with prefix"
+        position = bisect_left(values, prefix)
+        while position < len(values) and values[position].startswith(prefix):
+            yield values[position]
+            position += 1
+
+    def with_prefix(self, prefix):
+        "Distinct values starting with prefix"
+        return self.starting_with(self.sorted, prefix)
+
+    def with_suffix(self, suffix):
+        "Distinct values ending with suffix"
+        for value in self.starting_with(self.sorted_reversed, suffix[::-1]):
+            yield value[::-1]
+
+    def match(self, mask):
+        "Objects with the attribute matching the wildcard mask"
+        tokens = wildcard.tokenize(mask)
+        wild = [wildcard.is_wild(token) for token in tokens]
+        if self.fold is not None:
+            tokens = [token if is_wild else self.fold(token)
+                      for token, is_wild in zip(tokens, wild)]
+            mask = wildcard.untokenize(tokens)
+        if not any(wild):
+            candidates = [''.join(tokens)]
+        elif not wild[0]:
+            candidates = self.with_prefix(tokens[0])
+        elif not wild[-1] and self.suffixes:
+            candidates = self.with_suffix(tokens[-1])
+        else:
+            candidates = list(self.entries)
+        matches = wildcard.matcher(mask)
+        for value in candidates:
+            if value in self.entries and matches(value):
+                for obj in list(self.objects(value)):
+                    yield obj
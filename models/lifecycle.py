@@ -0,0 +1,30 @@
+"""
+Counters of the objects in the model database.
+
+Each model class has a Counter, updated by BaseModel when an object is
+saved for the first time (created) and when it's deleted (destroyed). The
+number of live objects should follow the number of clients and channels;
+if it keeps growing while they don't, objects are leaking.
+"""
+
+
+class Counter(object):
+    __slots__ = ('created', 'destroyed')
+
+    def __init__(self):
+        self.created = 0
+        self.destroyed = 0
+
+    @property
+    def live(self):
+        return self.created - self.destroyed
+
+
+# Model class -> Counter
+counters = {}
+
+
+def counter(cls):
+    if cls not in counters:
+        counters[cls] = Counter()
+    return counters[cls]
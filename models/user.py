@@ -1,38 +1,97 @@
+from include import casemapping
+from include.orderedset import OrderedSet
 from models.base import BaseModel
+from models.flags import Flags, flag
+from models.index import Index
 
 
 class User(BaseModel):
+    by_nickname = Index('nickname', casemapping.fold)
+    by_hostname = Index('hostname', casemapping.fold, suffixes=True)
+    by_username = Index('username', casemapping.fold)
+    by_realname = Index('realname', casemapping.fold)
+    by_server = Index('servername', casemapping.fold, suffixes=True)
+
+    fold = staticmethod(casemapping.fold)
+
+    __slots__ = ('nickname', 'channels', 'neighbours', 'hostname', 'username',
+                 'realname', 'servername', 'registration', 'modes', 'away',
+                 'actor', 'who_fields')
+
     def __init__(self, nickname):
+        super(User, self).__init__()
         self.nickname = nickname
-        self.channels = []
+        self.channels = OrderedSet()
+        # Users sharing at least one channel with this one, mapped to the
+        # number of channels they share, but for the channels too large to
+        # be counted: see all_neighbours. Kept up to date by Channel.
+        self.neighbours = {}
 
         self.hostname = None
         self.username = None
         self.realname = None
+        self.servername = None
 
-        self.registered = RegistrationStatus()
-
-        self.mode = UserMode()
+        # Flags of RegistrationStatus and UserMode
+        self.registration = 0
+        self.modes = 0
         self.away = False
+        # Cached by RPL_WHOREPLY: (the values it's made of, the encoded
+        # parameters)
+        self.who_fields = None
+
+    @property
+    def registered(self):
+        return RegistrationStatus(self)
+
+    @property
+    def mode(self):
+        return UserMode(self)
 
     def get_key(self):
         return self.nickname
 
     def rename(self, to):
         self.set_key(to)
+        for channel in self.channels:
+            channel.forget_names()
 
     def join(self, channel):
         if channel not in self.channels:
-            self.channels.append(channel)
+            self.channels.add(channel)
             channel.join(self)
 
     def part(self, channel):
         if channel in self.channels:
-            self.channels.remove(channel)
+            self.channels.discard(channel)
             channel.part(self)
 
+    def add_neighbour(self, user):
+        self.neighbours[user] = self.neighbours.get(user, 0) + 1
+
+    def remove_neighbour(self, user):
+        shared = self.neighbours.pop(user) - 1
+        if shared:
+            self.neighbours[user] = shared
+
+    def all_neighbours(self):
+        """
+        Users sharing at least one channel with this one: the neighbours
+        map, with the members of the channels it doesn't count added
+        """
+        large = [channel for channel in self.channels
+                 if not channel.tracks_neighbours]
+        if not large:
+            return self.neighbours
+        neighbours = OrderedSet(self.neighbours)
+        for channel in large:
+            for user in channel.users:
+                neighbours.add(user)
+        neighbours.discard(self)
+        return neighbours
+
     def delete(self):
-        for channel in self.channels:
+        for channel in list(self.channels):
             self.part(channel)
         super(User, self).delete()
 
@@ -46,20 +105,25 @@ class User(BaseModel):
         return str(self)
 
 
-class UserMode(object):
-    away = False
-    invisible = False
-    wallops = False
-    restricted = False
-    operator = False
-    local_operator = False
-    notices = False
+class UserMode(Flags):
+    __slots__ = ()
+    attribute = 'modes'
+
+    away = flag(1)
+    invisible = flag(2)
+    wallops = flag(4)
+    restricted = flag(8)
+    operator = flag(16)
+    local_operator = flag(32)
+    notices = flag(64)
+
 
+class RegistrationStatus(Flags):
+    __slots__ = ()
+    attribute = 'registration'
 
-class RegistrationStatus(object):
-    def __init__(self):
-        self.nick = False
-        self.user = False
+    nick = flag(1)
+    user = flag(2)
 
     @property
     def both(self):
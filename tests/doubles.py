@@ -0,0 +1,22 @@
+"Test doubles shared by the test modules"
+
+from mock import Mock
+
+from models import Actor
+
+
+class RecordingActor(Actor):
+    """
+    Keeps the messages written to it in received, and the number of them
+    at each flush in flushed
+    """
+    def __init__(self):
+        super(RecordingActor, self).__init__(Mock())
+        self.received = []
+        self.flushed = []
+
+    def write(self, message):
+        self.received.append(message)
+
+    def flush(self):
+        self.flushed.append(len(self.received))
@@ -0,0 +1,114 @@
+import unittest
+from mock import patch
+
+import gevent
+import gevent.server
+from gevent import socket
+
+import application
+from config import config
+from include import resolver
+from models import User
+from tests.test_include.test_resolver import StubResolver
+
+
+def read_until(sock, text):
+    data = b''
+    while text not in data:
+        received = sock.recv(65536)
+        if not received:
+            break
+        data += received
+    return data
+
+
+def read_all(sock):
+    "Everything received until the server closes the connection"
+    data = b''
+    while True:
+        received = sock.recv(4096)
+        if not received:
+            return data
+        data += received
+
+
+class ApplicationTest(unittest.TestCase):
+    def setUp(self):
+        # No PTR records, clients are known by their address
+        self.patchers = [
+            patch.object(resolver, 'backend', StubResolver()),
+            patch.object(resolver, 'cache', resolver.LRUCache(100)),
+            patch.object(resolver, 'ident_enabled', False),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.server = gevent.server.StreamServer(('127.0.0.1', 0),
+                                                 application.handle)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def connect(self):
+        sock = socket.create_connection(('127.0.0.1', self.server.server_port))
+        self.addCleanup(sock.close)
+        return sock
+
+    def test_quit(self):
+        "The ERROR for QUIT is written before the connection is closed"
+        sock = self.connect()
+        sock.sendall(b'NICK quitter\r\nUSER quitter 0 * :Quitter\r\n'
+                     b'QUIT :Bye\r\n')
+        with gevent.Timeout(5):
+            data = read_all(sock)
+        self.assertIn(b' 376 quitter ', data)
+        self.assertTrue(data.endswith(b':localhost ERROR \r\n'), data[-100:])
+
+    def test_protocol_error(self):
+        sock = self.connect()
+        sock.sendall(b'NICK\x00 :bad\r\n')
+        with gevent.Timeout(5):
+            data = read_all(sock)
+        self.assertEqual(b':localhost ERROR \r\n', data)
+
+    def test_pipelined(self):
+        "Replies show the state the line they answer was handled in"
+        sock = self.connect()
+        sock.sendall(b'NICK asker\r\nUSER asker 0 * :Asker\r\n'
+                     b'WHO asker\r\nNICK other\r\n')
+        with gevent.Timeout(5):
+            data = read_until(sock, b' NICK other\r\n')
+        self.assertIn(b' 352 asker asker asker ', data)
+        end = (b' 315 asker asker :End of WHO list\r\n'
+               b':asker!asker@127.0.0.1 NICK other\r\n')
+        self.assertTrue(data.endswith(end), data[-200:])
+
+    def test_who_larger_than_sendq(self):
+        "Replies streamed to the client don't pile up in its SendQ"
+        limits = [(name, config.get('server', name))
+                  for name in ['sendq_limit', 'sendq_high_water']]
+        config.set('server', 'sendq_limit', '20000')
+        config.set('server', 'sendq_high_water', '5000')
+        users = []
+        for number in range(1000):
+            user = User('who%d' % number)
+            user.hostname = 'host%d.example.com' % number
+            user.username = 'user'
+            user.servername = 'irc.example.com'
+            user.realname = 'Real Name'
+            user.save()
+            users.append(user)
+        try:
+            sock = self.connect()
+            sock.sendall(b'NICK asker\r\nUSER asker 0 * :Asker\r\n'
+                         b'WHO *.example.com\r\n')
+            with gevent.Timeout(5):
+                data = read_until(sock, b' 315 asker ')
+        finally:
+            for name, value in limits:
+                config.set('server', name, value)
+            for user in users:
+                user.delete()
+        self.assertEqual(1000, data.count(b' 352 asker '))
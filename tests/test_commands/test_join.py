@@ -41,9 +41,9 @@ class TestJoinCommand(unittest.TestCase):
 
     def joined_without_topic_response(self):
         return [
-            M(self.mock_actorcollection(self.users), 'JOIN', str(self.channel), prefix=self.joining_user),
+            M(self.channel.recipients, 'JOIN', str(self.channel), prefix=self.joining_user),
             RPL_NAMEREPLY(self.cmd.actor, self.channel),
-            RPL_ENDOFNAMES(self.cmd.actor)
+            RPL_ENDOFNAMES(self.cmd.actor, self.channel)
         ]
 
     def joined_with_topic_response(self):
@@ -59,6 +59,7 @@ class TestJoinCommand(unittest.TestCase):
         self.channel.name = '#channel'
         self.channel.__str__.return_value = self.channel.name
         self.channel.users = self.users
+        self.channel.names.return_value = [b'old joining']
 
     def setup_join_command(self):
         self.cmd = JoinCommand()
@@ -73,11 +74,8 @@ class TestJoinCommand(unittest.TestCase):
 
     def setup_mocks(self):
         self.channel_patcher = patch('commands.join.Channel')
-        self.actorcollection_patcher = patch('commands.join.ActorCollection')
         self.mock_channel = self.channel_patcher.start()
-        self.mock_actorcollection = self.actorcollection_patcher.start()
         self.mock_channel.get.return_value = self.channel
 
     def teardown_mocks(self):
         self.channel_patcher.stop()
-        self.actorcollection_patcher.stop()
@@ -50,6 +50,21 @@ class TestNickCommand(unittest.TestCase):
         self.assertIsNone(self.cmd.from_user(self.user.nickname))
         self.mock_user.get.assert_called_with(self.user.nickname)
 
+    @patch('commands.nick.Server')
+    def test_rename_case(self, mock_server):
+        "NICK to the already set nickname in another case"
+        mock_server.all.return_value = []
+        self.registered(user=True, nick=True)
+        self.nickname_unavailable()
+        self.mock_user.get.return_value = self.user
+        self.user.all_neighbours.return_value = {}
+        self.assertEqual(
+            M(self.mock_actorcollection(), 'NICK', 'NICK0',
+              prefix=str(self.user)),
+            self.cmd.from_user('NICK0')
+        )
+        self.user.rename.assert_called_with('NICK0')
+
     def test_first_nick(self):
         "First NICK, USER is not received"
         self.mock_user.return_value = self.user
@@ -81,17 +96,18 @@ class TestNickCommand(unittest.TestCase):
         mock_server.all.return_value = [Mock]
         self.registered(user=True, nick=True)
 
-        self.actor.channels = channels = [MagicMock(), MagicMock()]
-        for idx, channel in enumerate(channels):
-            channel.__str__.return_value = 'testchannel' + str(idx)
-            channel.users = [Mock(), Mock()]
+        neighbours = [Mock(), Mock()]
+        self.user.all_neighbours.return_value = dict(
+            (user, 1) for user in neighbours)
 
         self.assertEqual(
-            M(self.mock_actorcollection(
-                [self.actor] + mock_server.all() + channels[0].users + channels[1].users
-            ), 'NICK', 'foobar', prefix=str(self.user)),
+            M(self.mock_actorcollection(), 'NICK', 'foobar',
+              prefix=str(self.user)),
             self.cmd.from_user('foobar')
         )
+        targets = self.mock_actorcollection.call_args[0][0]
+        self.assertEqual([self.actor] + mock_server.all() + neighbours,
+                         list(targets))
 
     def registered(self, user=None, nick=None):
         if user is not None:
@@ -0,0 +1,44 @@
+import unittest
+from mock import Mock
+
+from commands.quit import QuitCommand
+from include.message import Message as M
+from models import Actor, Channel, User
+
+
+class TestQuitCommand(unittest.TestCase):
+    def setUp(self):
+        self.users = []
+        for nick in ['quitter', 'both', 'one']:
+            user = User(nick)
+            Actor(Mock()).user = user
+            user.save()
+            self.users.append(user)
+        quitter, both, one = self.users
+        self.channels = [Channel('#a'), Channel('#b')]
+        for channel in self.channels:
+            quitter.join(channel)
+            both.join(channel)
+        one.join(self.channels[0])
+        self.cmd = QuitCommand()
+        self.cmd.actor = quitter.actor
+        self.cmd.user = quitter
+
+    def tearDown(self):
+        for user in self.users[1:]:
+            user.delete()
+
+    def test_quit(self):
+        quitter, both, one = self.users
+        resp = self.cmd.from_user('bye')
+        self.assertEqual(2, len(resp))
+        quit, error = resp
+        self.assertEqual(M(None, 'QUIT', 'bye', prefix=str(quitter)).wire(),
+                         quit.wire())
+        self.assertEqual(set([both.actor, one.actor]), set(quit.target))
+        self.assertEqual(M(quitter.actor, 'ERROR'), error)
+        self.assertTrue(quitter.actor.disconnected)
+        self.assertFalse(User.exists('quitter'))
+        for channel in self.channels:
+            self.assertNotIn(quitter, channel.users)
+        self.assertEqual({one: 1}, both.neighbours)
@@ -0,0 +1,38 @@
+import unittest
+from mock import Mock, patch
+
+from include.message import Message as M
+from include.numeric_responses import *
+from commands.rehash import RehashCommand
+from models import Actor, User
+
+
+class TestRehashCommand(unittest.TestCase):
+    def setUp(self):
+        self.cmd = RehashCommand()
+        self.cmd.actor = Actor(Mock())
+        self.cmd.user = User('oper')
+        self.cmd.actor.user = self.cmd.user
+
+    @patch('commands.rehash.rehash')
+    def test_not_operator(self, rehash):
+        self.assertEqual(ERR_NOPRIVILEGES(self.cmd.actor),
+                         self.cmd.from_user())
+        self.assertFalse(rehash.called)
+
+    @patch('commands.rehash.rehash')
+    def test_operator(self, rehash):
+        self.cmd.user.mode.operator = True
+        self.assertEqual(RPL_REHASHING(self.cmd.actor, 'server.ini'),
+                         self.cmd.from_user())
+        rehash.assert_called_once_with()
+
+    @patch('commands.rehash.rehash')
+    def test_failed(self, rehash):
+        self.cmd.user.mode.operator = True
+        rehash.side_effect = ValueError('max_results: not an integer')
+        self.assertEqual(
+            M(self.cmd.actor, 'NOTICE', 'oper',
+              'Rehash failed, the configuration is unchanged: '
+              'max_results: not an integer'),
+            self.cmd.from_user())
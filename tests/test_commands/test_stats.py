@@ -0,0 +1,50 @@
+import unittest
+from mock import Mock
+
+from include.numeric_responses import *
+from commands.stats import StatsCommand
+from models import Actor, User
+
+
+class TestStatsCommand(unittest.TestCase):
+    def setUp(self):
+        self.cmd = StatsCommand()
+        self.cmd.actor = Actor(Mock())
+        self.user = User('stats')
+        self.user.mode.operator = True
+        self.user.save()
+        self.cmd.user = self.cmd.actor.user = self.user
+        self.cmd.actor.save()
+
+    def tearDown(self):
+        self.user.delete()
+        self.cmd.actor.delete()
+
+    def test_not_operator(self):
+        self.user.mode.operator = False
+        for query in [None, 'l', 'z']:
+            self.assertEqual(ERR_NOPRIVILEGES(self.cmd.actor),
+                             self.cmd.from_user(query))
+
+    def test_no_query(self):
+        self.assertEqual([RPL_ENDOFSTATS(self.cmd.actor, '*')],
+                         self.cmd.from_user())
+
+    def test_links(self):
+        self.cmd.actor.write(RPL_ENDOFSTATS(self.cmd.actor, '*'))
+        resp = self.cmd.from_user('l')
+        self.assertEqual(RPL_ENDOFSTATS(self.cmd.actor, 'l'), resp[-1])
+        linkinfo = [reply for reply in resp if reply.command == '211']
+        ours = [reply for reply in linkinfo
+                if reply.parameters[0] == str(self.user)]
+        self.assertEqual(1, len(ours))
+        self.assertEqual(str(self.cmd.actor.sendq_size),
+                         ours[0].parameters[1])
+
+    def test_models(self):
+        resp = self.cmd.from_user('z')
+        self.assertEqual(RPL_ENDOFSTATS(self.cmd.actor, 'z'), resp[-1])
+        lines = dict((reply.parameters[1].split()[0], reply.parameters[1])
+                     for reply in resp if reply.command == '249')
+        self.assertIn('Actor', lines)
+        self.assertIn('User', lines)
@@ -19,6 +19,8 @@ class TestNickCommand(unittest.TestCase):
 
         self.cmd = UserCommand()
         self.cmd.actor = MagicMock()
+        self.lookup = self.cmd.actor.lookup
+        self.lookup.result.return_value = ('host.example.com', 'username')
 
     def tearDown(self):
         self.user_patcher.stop()
@@ -37,6 +39,19 @@ class TestNickCommand(unittest.TestCase):
         self.assertEqual(self.cmd.actor.user, user)
         self.assertEqual(self.cmd.user, user)
         self.assertTrue(self.cmd.user.registered.user)
+        self.assertEqual('host.example.com', user.hostname)
+        self.lookup.result.assert_called_once_with('username')
+        self.assertIsNone(self.cmd.actor.lookup)
+
+    def test_ident(self):
+        "The username the lookups give is used"
+        self.cmd.actor.is_user.return_value = True
+        self.cmd.actor.user = self.cmd.user = user = self.users[0]
+        user.registered.nick = False
+        user.registered.user = False
+        self.lookup.result.return_value = ('host.example.com', '~username')
+        self.cmd.from_user('username', 'hostname', 'servername', 'realname')
+        self.assertEqual('~username', user.username)
 
     def test_after_nick(self):
         "NICK is received"
@@ -64,3 +79,25 @@ class TestNickCommand(unittest.TestCase):
             self.cmd.from_user('username', 'hostname', 'servername', 'realname')
         )
 
+
+    def test_handler_reused_during_lookup(self):
+        "Another client using the handler while the hostname is looked up"
+        self.cmd.actor.is_user.return_value = True
+        self.cmd.actor.user = self.cmd.user = user = self.users[0]
+        user.registered.nick = True
+        user.registered.user = False
+
+        def result(username):
+            self.cmd.actor = MagicMock()
+            self.cmd.user = self.users[1]
+            return 'host.example.com', username
+        self.lookup.result.side_effect = result
+        actor = self.cmd.actor
+        self.assertEqual(
+            welcome(actor),
+            self.cmd.from_user('username', 'hostname', 'servername', 'realname')
+        )
+        self.assertTrue(user.registered.user)
+        self.assertEqual('username', user.username)
+        user.save.assert_called_once_with()
+        self.assertFalse(self.users[1].save.called)
@@ -0,0 +1,62 @@
+import unittest
+from mock import Mock
+
+from config import config
+from include.numeric_responses import *
+from commands.who import WhoCommand, BURST_SIZE
+from models import Actor, User
+
+
+class TestWhoCommand(unittest.TestCase):
+    def setUp(self):
+        self.cmd = WhoCommand()
+        self.cmd.actor = Actor(Mock())
+        self.users = []
+        for number in range(250):
+            user = User('who%d' % number)
+            user.hostname = 'host%d.example.com' % number
+            user.username = 'user'
+            user.servername = 'irc.example.com'
+            user.realname = 'Real Name'
+            user.save()
+            self.users.append(user)
+
+    def tearDown(self):
+        config.set('server', 'max_results', '1000')
+        for user in self.users:
+            user.delete()
+
+    def test_stream(self):
+        resp = self.cmd.from_user('*.example.com')
+        bursts = list(resp)
+        self.assertEqual(RPL_ENDOFWHO(self.cmd.actor, '*.example.com'),
+                         bursts.pop())
+        self.assertEqual([BURST_SIZE, BURST_SIZE, 50],
+                         [len(burst) for burst in bursts])
+
+    def test_max_results(self):
+        config.set('server', 'max_results', '120')
+        bursts = list(self.cmd.from_user('who*'))
+        self.assertEqual(RPL_ENDOFWHO(self.cmd.actor, 'who*'), bursts.pop())
+        self.assertEqual(120, sum(len(burst) for burst in bursts))
+
+    def test_cached_fields(self):
+        user = self.users[0]
+        reply = RPL_WHOREPLY(self.cmd.actor, user, '#channel')
+        self.assertTrue(reply.wire_for('nick').endswith(
+            b' 352 nick #channel user host0.example.com irc.example.com '
+            b'who0 H :0 Real Name\r\n'))
+        fields = user.who_fields
+        RPL_WHOREPLY_BURST(self.cmd.actor, [user], '*')
+        self.assertIs(fields, user.who_fields)
+        for name, value in [('nickname', 'renamed'), ('username', 'other'),
+                            ('hostname', 'other.example.com'),
+                            ('realname', 'Other Name'), ('away', True)]:
+            setattr(user, name, value)
+            RPL_WHOREPLY_BURST(self.cmd.actor, [user], '*')
+            self.assertIsNot(fields, user.who_fields)
+            fields = user.who_fields
+        self.assertTrue(RPL_WHOREPLY(self.cmd.actor, user, '*').wire_for(
+            'nick').endswith(b' 352 nick * other other.example.com '
+                             b'irc.example.com renamed G :0 Other Name\r\n'))
+        user.nickname = 'who0'
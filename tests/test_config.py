@@ -0,0 +1,120 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from pydispatch import dispatcher
+
+from config import config, config_file, configure_logging
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.max_results = config.get('server', 'max_results')
+
+    def tearDown(self):
+        config.set('server', 'max_results', self.max_results)
+
+    def test_typed(self):
+        snapshot = config.snapshot
+        self.assertEqual(config.get('server', 'servername'),
+                         snapshot.servername)
+        self.assertEqual(config.getint('server', 'sendq_limit'),
+                         snapshot.sendq_limit)
+        self.assertIs(True, snapshot.lowercase_commands)
+
+    def test_swapped(self):
+        "Setting an option replaces the snapshot, before the signal is sent"
+        before = config.snapshot
+        seen = []
+
+        def receiver():
+            seen.append(config.snapshot.max_results)
+        dispatcher.connect(receiver, 'server.max_results', 'config')
+        try:
+            config.set('server', 'max_results', '7')
+        finally:
+            dispatcher.disconnect(receiver, 'server.max_results', 'config')
+        self.assertEqual([7], seen)
+        self.assertEqual(int(self.max_results), before.max_results)
+        self.assertRaises(AttributeError, setattr, before, 'max_results', 1)
+
+
+class RereadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'server.ini')
+        with open(config_file) as f:
+            self.original = f.read()
+        # Undo what other tests set
+        config.reread(config_file)
+        self.signals = []
+        for name in ['server.max_results', 'server.servername', 'rehash']:
+            dispatcher.connect(self.received, name, 'config')
+
+    def tearDown(self):
+        for name in ['server.max_results', 'server.servername', 'rehash']:
+            dispatcher.disconnect(self.received, name, 'config')
+        config.reread(config_file)
+        shutil.rmtree(self.directory)
+
+    def received(self, signal):
+        self.signals.append(signal)
+
+    def write(self, text):
+        with open(self.path, 'w') as f:
+            f.write(text)
+
+    def test_unchanged(self):
+        self.write(self.original)
+        self.assertEqual([], config.reread(self.path))
+        self.assertEqual(['rehash'], self.signals)
+
+    def test_changed(self):
+        self.write(self.original.replace('max_results = 1000',
+                                         'max_results = 10'))
+        self.assertEqual(['server.max_results'], config.reread(self.path))
+        self.assertEqual(['server.max_results', 'rehash'], self.signals)
+        self.assertEqual(10, config.snapshot.max_results)
+
+    def test_missing_option(self):
+        self.write('[server]\nmax_results = 10\n')
+        config.reread(self.path)
+        self.assertEqual(10, config.snapshot.max_results)
+        self.assertEqual('localhost', config.snapshot.servername)
+
+    def test_invalid(self):
+        "Nothing changes if a value is invalid"
+        snapshot = config.snapshot
+        self.write('[server]\nservername = other\nmax_results = many\n'
+                   '[extra]\noption = value\n')
+        sections = config.sections()
+        self.assertRaises(ValueError, config.reread, self.path)
+        self.assertEqual(snapshot, config.snapshot)
+        self.assertEqual('localhost', config.get('server', 'servername'))
+        self.assertEqual(sections, config.sections())
+        self.assertFalse(config.has_section('extra'))
+        self.assertEqual([], self.signals)
+
+    def test_unreadable(self):
+        self.assertRaises(IOError, config.reread,
+                          os.path.join(self.directory, 'missing.ini'))
+
+
+class LoggingTest(unittest.TestCase):
+    def setUp(self):
+        root = logging.getLogger()
+        self.root = root.level, root.handlers[:]
+
+    def tearDown(self):
+        dispatcher.disconnect(configure_logging, 'rehash', 'config')
+        root = logging.getLogger()
+        root.setLevel(self.root[0])
+        root.handlers[:] = self.root[1]
+
+    def test_existing_loggers(self):
+        "Loggers of modules imported before logging is configured still log"
+        logger = logging.getLogger('include.router')
+        configure_logging()
+        self.assertFalse(logger.disabled)
@@ -0,0 +1,15 @@
+import unittest
+
+from include import casemapping
+
+
+class CasemappingTest(unittest.TestCase):
+    def test_fold(self):
+        self.assertEqual('nick', casemapping.fold('NiCK'))
+        self.assertEqual('{}|^', casemapping.fold('[]\\~'))
+        self.assertEqual('{}|^', casemapping.fold('{}|^'))
+        self.assertEqual(u'n\xc9', casemapping.fold(u'N\xc9'))
+
+    def test_equal(self):
+        self.assertTrue(casemapping.equal('Foo[1]', 'fOO{1}'))
+        self.assertFalse(casemapping.equal('foo', 'foo_'))
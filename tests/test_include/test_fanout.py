@@ -0,0 +1,73 @@
+import unittest
+
+from include import fanout
+from include.fanout import FanOut
+from models import ActorCollection
+from tests.doubles import RecordingActor
+
+
+def recording_actors(count):
+    return [RecordingActor() for _ in range(count)]
+
+
+class FanOutTest(unittest.TestCase):
+    def setUp(self):
+        self.fanout = FanOut()
+        self.budget = fanout.budget
+
+    def tearDown(self):
+        fanout.budget = self.budget
+
+    def test_small(self):
+        col = ActorCollection(recording_actors(3))
+        self.assertTrue(self.fanout.write(col, 'a'))
+        self.assertIsNone(self.fanout.worker)
+        for actor in col:
+            self.assertEqual(['a'], actor.received)
+
+    def test_order(self):
+        col = ActorCollection(recording_actors(1000))
+        one = next(iter(col))
+        self.assertFalse(self.fanout.write(col, 'a'))
+        # Queued behind the large message
+        self.assertFalse(self.fanout.write(one, 'b'))
+        called = []
+        self.fanout.call(one, called.append, 'c')
+        self.assertEqual([], called)
+        # Others don't wait
+        other = recording_actors(1)[0]
+        self.assertTrue(self.fanout.write(other, 'd'))
+        self.assertEqual(['d'], other.received)
+        self.fanout.call(other, called.append, 'e')
+        self.assertEqual(['e'], called)
+        self.fanout.worker.join()
+        for actor in col:
+            expected = ['a', 'b'] if actor is one else ['a']
+            self.assertEqual(expected, actor.received)
+            self.assertTrue(actor.flushed)
+        self.assertEqual(['e', 'c'], called)
+
+    def test_chunks(self):
+        col = ActorCollection(recording_actors(1000))
+        self.fanout.write(col, 'a')
+        self.assertEqual(100, self.fanout.run_chunk(100))
+        written = [actor for actor in col if actor.received]
+        self.assertEqual(100, len(written))
+        self.assertEqual([[1]] * len(written),
+                         [actor.flushed for actor in written])
+        self.fanout.worker.join()
+        self.assertTrue(all(actor.received == ['a'] for actor in col))
+
+    def test_resize(self):
+        "Chunks are sized to take about the budget, work they cause included"
+        fanout.budget = 0.002
+        self.fanout.chunk_size = 1000
+        self.fanout.resize(1000, 0.001)
+        self.assertEqual(1500, self.fanout.chunk_size)
+        self.fanout.resize(1500, 0.010)
+        self.assertEqual(900, self.fanout.chunk_size)
+        self.fanout.resize(900, 10)
+        self.assertEqual(450, self.fanout.chunk_size)
+        for _ in range(20):
+            self.fanout.resize(450, 10)
+        self.assertEqual(fanout.MIN_CHUNK, self.fanout.chunk_size)
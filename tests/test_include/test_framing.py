@@ -0,0 +1,35 @@
+import socket
+import unittest
+
+from include.framing import LineReader
+
+
+class LineReaderTest(unittest.TestCase):
+    def test_feed(self):
+        reader = LineReader(None)
+        self.assertEqual([], reader.feed(b'PING'))
+        self.assertEqual([b'PING a\r\n', b'PING b\r\n'],
+                         reader.feed(b' a\r\nPING b\r\nPI'))
+        self.assertEqual([b'PING c\n'], reader.feed(b'NG c\n'))
+        self.assertEqual(b'', bytes(reader.buffer))
+
+    def test_too_long(self):
+        reader = LineReader(None, max_length=10)
+        self.assertEqual([b'x' * 11], reader.feed(b'x' * 8 + b'x' * 8))
+        # The rest of the line is dropped as it arrives
+        self.assertEqual([], reader.feed(b'x' * 20))
+        self.assertEqual([b'PING\r\n'], reader.feed(b'x\r\nPING\r\n'))
+        # Complete lines are passed on as they are, to be rejected by parsing
+        self.assertEqual([b'y' * 20 + b'\n'], reader.feed(b'y' * 20 + b'\n'))
+
+    def test_read(self):
+        server, client = socket.socketpair()
+        try:
+            reader = LineReader(server, recv_size=8)
+            client.sendall(b'NICK a\r\nUSER b\r\n')
+            self.assertEqual([b'NICK a\r\n'], reader.read())
+            self.assertEqual([b'USER b\r\n'], reader.read())
+            client.close()
+            self.assertIsNone(reader.read())
+        finally:
+            server.close()
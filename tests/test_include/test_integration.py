@@ -9,6 +9,10 @@ class ActorDisconnectOnWrite(Actor):
     def write(self, message):
         self.disconnect()
 
+class ActorDropOnWrite(Actor):
+    def write(self, message):
+        self.drop('Connection lost')
+
 class IntegrationTest(unittest.TestCase):
     def test_actorcollection_disconnect(self):
         shutdown_signal = Mock()
@@ -16,6 +20,7 @@ class IntegrationTest(unittest.TestCase):
 
         a0 = ActorDisconnectOnWrite(Mock())
         router.send(Message(a0, 'FOO'))
+        router.process_disconnects()
         a0.socket.shutdown.assert_called_with(shutdown_signal)
         a0.socket.close.assert_called_once()
 
@@ -25,6 +30,19 @@ class IntegrationTest(unittest.TestCase):
         ])
 
         router.send(Message(col, 'FOO'))
+        router.process_disconnects()
         for actor in col:
             actor.socket.shutdown.assert_called_with(shutdown_signal)
             actor.socket.close.assert_called_once()
+
+    def test_dropped_connections(self):
+        router = Router(Mock())
+        col = ActorCollection([ActorDropOnWrite(Mock()) for _ in range(2000)])
+        router.send(Message(col, 'FOO'))
+        # Large collections are written by a greenlet
+        router.fanout.worker.join()
+        router.process_disconnects()
+        self.assertEqual([], router.dropped)
+        for actor in col:
+            self.assertTrue(actor.disconnected)
+            actor.socket.close.assert_called_once_with()
@@ -0,0 +1,31 @@
+import unittest
+
+from include.lru import LRUCache, lru_cache
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(2, len(cache))
+
+    def test_decorator(self):
+        calls = []
+
+        @lru_cache(2)
+        def f(x):
+            calls.append(x)
+            return None
+
+        f(1)
+        f(1)
+        f(2)
+        f(3)
+        f(1)
+        self.assertEqual([1, 2, 3, 1], calls)
@@ -0,0 +1,57 @@
+import unittest
+from mock import patch
+
+from include import message
+from include.message import Message
+
+
+class MessageTest(unittest.TestCase):
+    def test_wire(self):
+        msg = Message(None, 'PRIVMSG', '#a', 'hello world', prefix='n!u@h')
+        self.assertEqual(b':n!u@h PRIVMSG #a :hello world\r\n', msg.wire())
+        self.assertEqual(str(msg).encode(), msg.wire())
+
+    def test_wire_is_cached(self):
+        msg = Message(None, 'PRIVMSG', '#a', 'hello', prefix='n!u@h')
+        self.assertIs(msg.wire(), msg.wire())
+
+    def test_wire_for(self):
+        msg = Message(None, '001', 'Welcome home', prefix='server')
+        self.assertEqual(b':server 001 nick :Welcome home\r\n',
+                         msg.wire_for('nick'))
+        self.assertEqual(b':server 001 other :Welcome home\r\n',
+                         msg.wire_for('other'))
+        self.assertEqual(['Welcome home'], msg.parameters)
+        msg = Message(None, '001', prefix='server')
+        self.assertEqual(b':server 001 nick\r\n', msg.wire_for('nick'))
+
+    def test_trailing_colon(self):
+        for param, expected in [('', ':'), (':x', '::x'), ('x', 'x')]:
+            msg = Message(None, 'PONG', param)
+            self.assertEqual(('PONG %s\r\n' % expected).encode(), msg.wire())
+
+    def test_invalidate(self):
+        msg = Message(None, 'PING', 'x')
+        msg.wire()
+        msg.prefix = 'server'
+        self.assertEqual(b':server PING x\r\n', msg.wire())
+        msg.parameters = ['y']
+        self.assertEqual(b':server PING y\r\n', msg.wire())
+        msg.command = 'PONG'
+        msg.invalidate()
+        self.assertEqual(b':server PONG y\r\n', msg.wire())
+
+    def test_relayed_parameter(self):
+        received = Message.from_bytes(b'PRIVMSG #a :\xe9t\xe9\r\n')
+        text = received.get_parameters(1)[1]
+        msg = Message(None, 'PRIVMSG', '#a', text, prefix='n!u@h')
+        self.assertEqual(b':n!u@h PRIVMSG #a :\xe9t\xe9\r\n', msg.wire())
+        msg = Message(None, 'PRIVMSG', '#a', memoryview(b'hi'))
+        self.assertEqual(b'PRIVMSG #a :hi\r\n', msg.wire())
+
+    def test_relayed_parameter_copied(self):
+        "Without RELAY_VIEWS, as on Python 2, relayed parameters are copied"
+        with patch.object(message, 'RELAY_VIEWS', False):
+            self.assertIs(bytes, type(message.encode(memoryview(b'hi'))))
+            msg = Message(None, 'PRIVMSG', '#a', memoryview(b'hi'))
+            self.assertEqual(b'PRIVMSG #a :hi\r\n', msg.wire())
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from config import config
+from include import motd
+
+
+class MOTDTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'motd.txt')
+        self.write('Hello\nWorld\n')
+        self.motd_file = config.get('server', 'motd_file')
+        config.set('server', 'motd_file', self.path)
+
+    def tearDown(self):
+        config.set('server', 'motd_file', self.motd_file)
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        with open(self.path, 'w') as f:
+            f.write(text)
+
+    def test_lines(self):
+        self.assertEqual(
+            b':localhost 375 nick :- localhost Message of the day - \r\n'
+            b':localhost 372 nick :- Hello\r\n'
+            b':localhost 372 nick :- World\r\n'
+            b':localhost 376 nick :End of MOTD command\r\n',
+            motd.motd(None).wire_for('nick'))
+
+    def test_read_once(self):
+        with patch.object(motd, 'read_lines', wraps=motd.read_lines) as read:
+            for _ in range(100):
+                motd.motd(None)
+        self.assertEqual(1, read.call_count)
+
+    def test_changed(self):
+        motd.motd(None)
+        self.write('Changed\n')
+        with patch.object(motd, 'CHECK_INTERVAL', 0):
+            self.assertIn(b':- Changed\r\n', motd.motd(None).wire_for('nick'))
+
+    def test_reload(self):
+        motd.motd(None)
+        with patch.object(motd, 'file_stat', return_value=motd.stat):
+            self.write('Same size\n')
+            with patch.object(motd, 'CHECK_INTERVAL', 0):
+                self.assertNotIn(b'Same size', motd.motd(None).wire())
+            motd.reload()
+            self.assertIn(b'Same size', motd.motd(None).wire())
+
+    def test_missing(self):
+        os.remove(self.path)
+        motd.reload()
+        self.assertEqual(
+            b':localhost 375 nick :- localhost Message of the day - \r\n'
+            b':localhost 376 nick :End of MOTD command\r\n',
+            motd.motd(None).wire_for('nick'))
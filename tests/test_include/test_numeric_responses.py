@@ -0,0 +1,29 @@
+import unittest
+
+from include.numeric_responses import RPL_NAMEREPLY, RPL_ENDOFNAMES
+from models import Channel, User
+
+
+class NamesTest(unittest.TestCase):
+    def setUp(self):
+        self.channel = Channel('#big')
+        self.users = [User('user%d' % number) for number in range(200)]
+        for user in self.users:
+            user.join(self.channel)
+
+    def test_line_length(self):
+        data = RPL_NAMEREPLY(None, self.channel).wire_for('longnick9')
+        lines = data.split(b'\r\n')[:-1]
+        self.assertTrue(len(lines) > 1)
+        nicks = []
+        for line in lines:
+            self.assertTrue(len(line) + 2 <= 512)
+            self.assertTrue(line.startswith(b':'))
+            self.assertIn(b' 353 longnick9 = #big :', line)
+            nicks += line.split(b' :', 1)[1].split(b' ')
+        self.assertEqual([user.nickname.encode() for user in self.users],
+                         nicks)
+
+    def test_endofnames(self):
+        self.assertTrue(RPL_ENDOFNAMES(None, self.channel).wire_for('nick')
+                        .endswith(b' 366 nick #big :End of NAMES list\r\n'))
@@ -0,0 +1,151 @@
+import random
+import unittest
+
+from config import config
+from include import abnf, parser
+from include.message import Message
+
+
+def fast(string):
+    raw = parser.parse(string)
+    if not raw:
+        return False
+    prefix, command, params = raw
+    return [prefix, command] + parser.split_params(params)
+
+
+def fast_bytes(string, opaque_from=None):
+    raw = parser.parse_bytes(string.encode('latin-1'))
+    if not raw:
+        return False
+    prefix, command, params = raw
+    return [prefix, command] + parser.split_params_bytes(params, opaque_from)
+
+
+def reference(string):
+    return abnf.parse(string, abnf.message)
+
+
+class Fuzzer(object):
+    "Generates lines that are mostly almost valid messages"
+    chars = [' ', ' ', ':', ':', '\r', '\n', '\t', '\0', '\x01', '\x0b',
+             '!', '@', '.', '-', '#', '[', '`', '{', '}', '\xe9', '\xff',
+             'Ā', 'a', 'Z', 'F', '0', '9']
+    commands = ['PRIVMSG', 'join', '001', '1234', 'A1', '', ':']
+    prefixes = ['nick', 'nick!user@host', 'n@1.2.3.4', 'a.b-c.d', 'a.',
+                'n@0:0:0:0:0:FFFF:1.2.3.4', 'n@1:2:3:4:5:6:7:AB',
+                'n!u@h.', 'toolongnick!u@h', 'n!u!u@h']
+    eols = ['\r\n', '\r', '\n', '\n\r', '', '\r\n\r\n', '\r\n \t', ' \r\n']
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+
+    def noise(self, max_length):
+        return ''.join(self.random.choice(self.chars)
+                       for _ in range(self.random.randint(0, max_length)))
+
+    def word(self):
+        if self.random.random() < 0.2:
+            return self.noise(4)
+        return self.random.choice(['a', '#chan', 'x:y', 'é', '1', '-'])
+
+    def line(self):
+        if self.random.random() < 0.1:
+            return self.noise(30)
+        line = ''
+        if self.random.random() < 0.3:
+            line += ':' + self.random.choice(self.prefixes + [self.noise(6)])
+            line += ' ' * self.random.randint(0, 2)
+        line += self.random.choice(self.commands)
+        for _ in range(self.random.choice([0, 1, 2, 3, 13, 14, 15, 16])):
+            line += ' ' + self.word()
+        if self.random.random() < 0.5:
+            line += self.random.choice([' :', ' ', ' ::', '']) + self.noise(8)
+        line += ' ' * self.random.choice([0, 0, 1, 3])
+        return line + self.random.choice(self.eols)
+
+
+class ParserTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = config.get('parser', 'engine')
+
+    def tearDown(self):
+        config.set('parser', 'engine', self.engine)
+        config.set('parser', 'trailing_spaces', 'true')
+        config.set('parser', 'soft_eol', 'true')
+
+    def _test_agree(self, lines):
+        for trailing_spaces in ['false', 'true']:
+            for soft_eol in ['false', 'true']:
+                config.set('parser', 'trailing_spaces', trailing_spaces)
+                config.set('parser', 'soft_eol', soft_eol)
+                for line in lines:
+                    self.assertEqual(
+                        reference(line), fast(line),
+                        'Parsers disagree on %r with trailing_spaces=%s, '
+                        'soft_eol=%s' % (line, trailing_spaces, soft_eol))
+
+    def test_examples(self):
+        self._test_agree([
+            'PING\r\n',
+            'PING :\r\n',
+            'PING \r\n',
+            'JOIN #a :\r\n',
+            ' JOIN #a\r\n',
+            'JOIN #a\r\n\n',
+            ':a!b@c.d PRIVMSG #x :hi there  \r\n',
+            ':a!b PRIVMSG\r\n',
+            ':a@1.2.3.4 X\r\n',
+            'C a\tb\r\n',
+            'C :a\tb\r\n',
+            'C a:b :c:d\r\n',
+            'C ' + ' '.join(str(i) for i in range(1, 15)) + ' \r\n',
+            'C ' + ' '.join(str(i) for i in range(1, 15)) + '  \r\n',
+            'C ' + ' '.join(str(i) for i in range(1, 17)) + ' :x\r\n',
+        ])
+
+    def test_fuzz(self):
+        fuzzer = Fuzzer(2812)
+        self._test_agree([fuzzer.line() for _ in range(500)])
+
+    def test_bytes(self):
+        fuzzer = Fuzzer(1459)
+        fuzzer.chars = [char for char in fuzzer.chars if char <= '\xff']
+        for trailing_spaces in ['false', 'true']:
+            for soft_eol in ['false', 'true']:
+                config.set('parser', 'trailing_spaces', trailing_spaces)
+                config.set('parser', 'soft_eol', soft_eol)
+                for _ in range(500):
+                    line = fuzzer.line()
+                    self.assertEqual(fast(line), fast_bytes(line),
+                                     'Parsers disagree on %r' % line)
+
+    def test_opaque_trailing(self):
+        line = 'PRIVMSG #a :hello world\r\n'
+        self.assertEqual(['', 'PRIVMSG', '#a', 'hello world'],
+                         fast_bytes(line, 2))
+        trailing = fast_bytes(line, 1)[-1]
+        self.assertIsInstance(trailing, memoryview)
+        self.assertEqual(b'hello world', trailing)
+        self.assertEqual('PING', fast_bytes('PING\r\n', 0)[1])
+
+    def test_non_utf8(self):
+        msg = Message.from_bytes(b'PRIVMSG #caf\xe9 :\xe9t\xe9\r\n')
+        self.assertEqual(['#caf\xe9', '\xe9t\xe9'], msg.parameters)
+        msg = Message.from_bytes(b'PRIVMSG #a :\xe9t\xe9\r\n')
+        self.assertEqual(b'\xe9t\xe9', msg.get_parameters(1)[1])
+
+    def test_lazy_parameters(self):
+        msg = Message.from_string('PRIVMSG #a :hello world\r\n')
+        self.assertIsNone(msg._parameters)
+        self.assertEqual(['#a', 'hello world'], msg.parameters)
+
+    def test_engines_agree(self):
+        lines = ['privmsg #a :hello world\r\n', ':n!u@h PING x\r\n']
+        for line in lines:
+            config.set('parser', 'engine', 'abnf')
+            expected = Message.from_string(line)
+            config.set('parser', 'engine', 'fast')
+            actual = Message.from_string(line)
+            self.assertEqual(expected, actual)
+            self.assertEqual(expected.prefix, actual.prefix)
@@ -0,0 +1,150 @@
+import unittest
+from mock import Mock, patch
+
+import gevent
+import gevent.server
+from gevent import socket
+
+from include import resolver
+from include.resolver import Lookup, parse_ident
+
+
+class StubResolver(object):
+    "Answers from dicts of PTR and forward records, after delay seconds"
+    def __init__(self, ptr=None, forward=None, delay=0):
+        self.ptr_records = ptr or {}
+        self.forward_records = forward or {}
+        self.delay = delay
+        self.queries = 0
+
+    def ptr(self, address):
+        self.queries += 1
+        gevent.sleep(self.delay)
+        if address not in self.ptr_records:
+            raise LookupError(address)
+        return self.ptr_records[address]
+
+    def addresses(self, hostname, ipv6=False):
+        self.queries += 1
+        return self.forward_records.get(hostname, [])
+
+
+def client(address='192.0.2.1', port=50000):
+    sock = Mock()
+    sock.getpeername.return_value = (address, port)
+    sock.getsockname.return_value = ('127.0.0.1', 6667)
+    return sock
+
+
+class ResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubResolver(
+            ptr={'127.0.0.1': 'host.example.com',
+                 '192.0.2.1': 'host.example.com',
+                 '192.0.2.2': 'spoofed.example.com',
+                 '192.0.2.3': 'not a hostname'},
+            forward={'host.example.com': ['127.0.0.1', '192.0.2.1'],
+                     'spoofed.example.com': ['198.51.100.1']})
+        self.patchers = [
+            patch.object(resolver, 'backend', self.stub),
+            patch.object(resolver, 'cache', resolver.LRUCache(100)),
+            patch.object(resolver, 'timeout', 0.5),
+            patch.object(resolver, 'ident_enabled', False),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def hostname(self, address):
+        return Lookup(client(address)).result('user')[0]
+
+    def test_confirmed(self):
+        self.assertEqual('host.example.com', self.hostname('192.0.2.1'))
+
+    def test_not_confirmed(self):
+        self.assertEqual('192.0.2.2', self.hostname('192.0.2.2'))
+        self.assertEqual('192.0.2.3', self.hostname('192.0.2.3'))
+
+    def test_no_ptr(self):
+        self.assertEqual('192.0.2.4', self.hostname('192.0.2.4'))
+
+    def test_cached(self):
+        self.hostname('192.0.2.1')
+        self.hostname('192.0.2.4')
+        queries = self.stub.queries
+        self.assertEqual('host.example.com', self.hostname('192.0.2.1'))
+        self.assertEqual('192.0.2.4', self.hostname('192.0.2.4'))
+        self.assertEqual(queries, self.stub.queries)
+
+    def test_expired(self):
+        with patch.object(resolver, 'negative_ttl', 0):
+            self.hostname('192.0.2.4')
+            self.hostname('192.0.2.4')
+        self.assertEqual(2, self.stub.queries)
+
+    def test_cache_bounded(self):
+        resolver.cache = resolver.LRUCache(2)
+        for number in range(10):
+            self.hostname('192.0.2.%d' % number)
+        self.assertEqual(2, len(resolver.cache))
+
+    def test_shared(self):
+        "Clients connecting from one address at once share the query"
+        self.stub.delay = 0.01
+        lookups = [Lookup(client()) for _ in range(10)]
+        for lookup in lookups:
+            self.assertEqual('host.example.com', lookup.result('user')[0])
+        self.assertEqual(2, self.stub.queries)
+        self.assertEqual({}, resolver.pending)
+
+    def test_deadline(self):
+        "A lookup that isn't done in time falls back to the address"
+        self.stub.delay = 10
+        with patch.object(resolver, 'timeout', 0.01):
+            self.assertEqual('192.0.2.1', self.hostname('192.0.2.1'))
+            gevent.sleep(0.05)
+        self.assertEqual({}, resolver.pending)
+        # Cached as a failure
+        self.assertEqual('192.0.2.1', self.hostname('192.0.2.1'))
+        self.assertEqual(1, self.stub.queries)
+
+    def test_ident(self):
+        def handle(sock, address):
+            query = sock.recv(100)
+            sock.sendall(query.strip() + b' : USERID : UNIX : alice\r\n')
+            sock.close()
+        server = gevent.server.StreamServer(('127.0.0.1', 0), handle)
+        server.start()
+        try:
+            with patch.object(resolver, 'IDENT_PORT', server.server_port), \
+                    patch.object(resolver, 'ident_enabled', True):
+                self.assertEqual(
+                    ('host.example.com', 'alice'),
+                    Lookup(client('127.0.0.1')).result('user'))
+        finally:
+            server.stop()
+
+    def test_no_ident(self):
+        "No ident server listening"
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+        listener.close()
+        with patch.object(resolver, 'IDENT_PORT', port), \
+                patch.object(resolver, 'ident_enabled', True):
+            self.assertEqual(('host.example.com', '~user'),
+                             Lookup(client('127.0.0.1')).result('user'))
+
+    def test_parse_ident(self):
+        self.assertEqual('alice', parse_ident(
+            b'50000 , 6667 : USERID : UNIX : alice\r\n', 50000, 6667))
+        self.assertIsNone(parse_ident(
+            b'50000, 6667 : ERROR : NO-USER\r\n', 50000, 6667))
+        self.assertIsNone(parse_ident(
+            b'50001, 6667 : USERID : UNIX : alice\r\n', 50000, 6667))
+        self.assertIsNone(parse_ident(
+            b'50000, 6667 : USERID : UNIX : al ice\r\n', 50000, 6667))
+        self.assertIsNone(parse_ident(b'garbage', 50000, 6667))
@@ -0,0 +1,64 @@
+import unittest
+from mock import Mock
+
+from include import router
+from include.message import Message
+from include.router import Router
+from include.templates import Template, Burst
+from tests.doubles import RecordingActor
+
+
+class RouterTest(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(Mock())
+        self.actor = RecordingActor()
+
+    def test_nested(self):
+        messages = [Message(self.actor, 'A'),
+                    [Message(self.actor, 'B'), None],
+                    (Message(self.actor, name) for name in 'CD')]
+        self.router.send(messages)
+        self.assertEqual(['A', 'B', 'C', 'D'],
+                         [message.command for message in self.actor.received])
+        self.assertEqual([4], self.actor.flushed)
+
+    def test_stream(self):
+        produced = []
+
+        def messages():
+            for number in range(250):
+                produced.append(number)
+                yield Message(self.actor, 'PING', str(number))
+
+        self.actor.wait_readable = Mock(
+            side_effect=lambda: self.assertEqual(
+                len(produced), len(self.actor.received)))
+        self.router.send(messages(), self.actor)
+        chunk = router.STREAM_CHUNK
+        self.assertEqual([chunk, 2 * chunk, 250], self.actor.flushed)
+        self.assertEqual(2, self.actor.wait_readable.call_count)
+
+    def test_stream_bursts(self):
+        "A Burst counts as a line for each of its rows"
+        template = Template('372', ':- {text}')
+        rows = [{'text': 'line'}] * router.STREAM_CHUNK
+        self.actor.wait_readable = Mock()
+        self.router.send((Burst(template, self.actor, rows)
+                          for _ in range(3)), self.actor)
+        self.assertEqual([1, 2, 3], self.actor.flushed)
+        self.assertEqual(3, self.actor.wait_readable.call_count)
+
+    def test_stream_to_others(self):
+        "Only the requester is waited for, not the targets"
+        target = RecordingActor()
+        target.wait_readable = Mock()
+        self.actor.wait_readable = Mock()
+        messages = [Message(target, 'PRIVMSG', 'target', str(number))
+                    for number in range(250)]
+        self.router.send(iter(messages), self.actor)
+        self.assertEqual(250, len(target.received))
+        self.assertFalse(target.wait_readable.called)
+        self.assertEqual(2, self.actor.wait_readable.call_count)
+        self.router.send(iter(messages))
+        self.assertFalse(target.wait_readable.called)
+        self.assertEqual(2, self.actor.wait_readable.call_count)
@@ -0,0 +1,77 @@
+import unittest
+
+from config import config
+from include.message import Message, Error
+from include.templates import Template, Reply, Burst, Block
+
+
+class TemplateTest(unittest.TestCase):
+    def setUp(self):
+        self.servername = config.get('server', 'servername')
+        config.set('server', 'servername', 'irc.example.com')
+        self.template = Template('442', "{channel} :You're not on {channel}")
+
+    def tearDown(self):
+        config.set('server', 'servername', self.servername)
+
+    def test_render(self):
+        self.assertEqual(
+            b":irc.example.com 442 nick #a :You're not on #a\r\n",
+            self.template.render('nick', {'channel': '#a'}))
+        self.assertEqual(
+            b":irc.example.com 442 #a :You're not on #a\r\n",
+            self.template.render(None, {'channel': '#a'}))
+
+    def test_render_many(self):
+        self.assertEqual(
+            b":irc.example.com 442 nick #a :You're not on #a\r\n"
+            b":irc.example.com 442 nick #b :You're not on #b\r\n",
+            self.template.render_many(
+                'nick', [{'channel': '#a'}, {'channel': '#b'}]))
+
+    def test_room(self):
+        template = Template('353', '= {channel} :{nicks}')
+        room = template.room('nicks', {'channel': '#a'}, 9)
+        line = template.render('n' * 9, {'channel': '#a', 'nicks': 'x' * room})
+        self.assertEqual(512, len(line))
+
+    def test_space_in_middle(self):
+        self.assertRaises(Error, self.template.render,
+                          'nick', {'channel': '#a b'})
+
+    def test_constants(self):
+        template = Template('002', ':Your host is {servername}')
+        self.assertEqual(b':irc.example.com 002 nick :Your host is '
+                         b'irc.example.com\r\n',
+                         template.render('nick', {}))
+        config.set('server', 'servername', 'other')
+        self.assertEqual(b':other 002 nick :Your host is other\r\n',
+                         template.render('nick', {}))
+
+    def test_reply_is_message(self):
+        reply = Reply(self.template, None, channel='#a')
+        self.assertEqual(
+            Message(None, '442', '#a', "You're not on #a",
+                    prefix='irc.example.com'),
+            reply)
+        self.assertEqual(reply.wire_for('nick'),
+                         self.template.render('nick', {'channel': '#a'}))
+
+    def test_burst(self):
+        rows = [{'channel': '#a'}, {'channel': '#b'}]
+        burst = Burst(self.template, None, rows)
+        self.assertEqual(self.template.render_many('nick', rows),
+                         burst.wire_for('nick'))
+        self.assertEqual(Burst(self.template, None, list(rows)), burst)
+
+    def test_block(self):
+        rows = [{'channel': '#a'}, {'channel': '#b'}]
+        replies = [Reply(self.template, None, channel='#c'),
+                   Burst(self.template, None, rows)]
+        block = Block(None, Block.render(replies))
+        for nick in ['nick', 'other']:
+            self.assertEqual(
+                b''.join(reply.wire_for(nick) for reply in replies),
+                block.wire_for(nick))
+        self.assertEqual(b''.join(reply.wire() for reply in replies),
+                         block.wire())
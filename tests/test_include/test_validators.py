@@ -0,0 +1,67 @@
+# coding=utf-8
+
+import unittest
+
+from include import validators
+
+
+class ValidatorsTest(unittest.TestCase):
+    def _test(self, validator, cases):
+        for input, expected in cases.items():
+            self.assertEqual(expected, validator(input), input)
+
+    def test_nickname(self):
+        self._test(validators.is_nickname, {
+            '333': False,
+            'abcd': True,
+            '[]\\`_^{|}': True,
+            'a-1': True,
+            'ninechars': True,
+            'tenletters': False,
+            'ab cd': False,
+            'abc ': False,
+            u'\1special\300': False
+        })
+
+    def test_user(self):
+        self._test(validators.is_user, {
+            'a b': False,
+            'a\rb': False,
+            'a@b': False,
+            'asdf': True,
+            '!#^QWER': True
+        })
+
+    def test_host(self):
+        self._test(validators.is_host, {
+            '': False,
+            'a-b.': False,
+            'a-b.c-d.ef': True,
+            '127.0.0.1': True,
+            '0:0:0:0:0:FFFF:127.0.0.1': True,
+            '1:2:3:4:5:6:7:AB': True,
+            '1:2:3': False
+        })
+
+    def test_split_channel(self):
+        self._test(validators.split_channel, {
+            '#foo': ('#', None, 'foo'),
+            '&foo': ('&', None, 'foo'),
+            '#foo:bar': ('#', None, 'foo'),
+            '!12345foo': ('!', '12345', 'foo'),
+            '!12345foo:barbaz': ('!', '12345', 'foo'),
+            '!1234': None,
+            'foo': None,
+            '#': None,
+            '#a,b': None,
+            '#a b': None
+        })
+
+    def test_cache_is_bounded(self):
+        cache = validators.split_channel.cache
+        cache.clear()
+        for i in range(validators.CACHE_SIZE + 10):
+            validators.is_channel('#channel%d' % i)
+        self.assertEqual(validators.CACHE_SIZE, len(cache))
+        self.assertNotIn('#channel0', cache)
+        self.assertIn('#channel%d' % (validators.CACHE_SIZE + 9), cache)
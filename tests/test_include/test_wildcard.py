@@ -0,0 +1,67 @@
+import unittest
+
+from include import wildcard
+
+
+class WildcardTest(unittest.TestCase):
+    def _test(self, mask, cases):
+        for input, expected in cases.items():
+            self.assertEqual(expected, wildcard.match(mask, input),
+                             '%s against %s' % (input, mask))
+
+    def test_wildone(self):
+        self._test('a?b', {
+            'abb': True,
+            'a3b': True,
+            'ab': False,
+            'xab': False,
+            'abx': False
+        })
+
+    def test_wildmany(self):
+        self._test('a*b', {
+            'ab': True,
+            'a foobar b': True,
+            'qab': False,
+            'abq': False
+        })
+
+    def test_suffix(self):
+        self._test('*.example.com', {
+            'irc.example.com': True,
+            '.example.com': True,
+            'example.com': False,
+            'irc.exampleXcom': False
+        })
+
+    def test_prefix(self):
+        self._test('nick*', {
+            'nick': True,
+            'nickname': True,
+            'nic': False
+        })
+
+    def test_everything(self):
+        self._test('*', {'': True, 'anything': True, None: False})
+        self._test('**', {'': True, 'anything': True})
+
+    def test_literal(self):
+        self._test('a.b', {'a.b': True, 'axb': False})
+        self._test('a\\*b', {'a*b': True, 'axb': False})
+        self._test('a\\b', {'a\\b': True})
+
+    def test_mixed(self):
+        self._test('*a?c*', {'abc': True, 'xxabcxx': True, 'ac': False})
+
+    def test_cache(self):
+        wildcard.matcher.cache.clear()
+        self.assertIs(wildcard.matcher('a*'), wildcard.matcher('a*'))
+        for i in range(wildcard.CACHE_SIZE + 1):
+            wildcard.matcher('mask%d*' % i)
+        self.assertEqual(wildcard.CACHE_SIZE, len(wildcard.matcher.cache))
+        self.assertNotIn('a*', wildcard.matcher.cache)
+
+    def test_untokenize(self):
+        for mask in ['a*b?c', '\\*x*', '*.isp.net', 'a\\b', 'a\\?']:
+            self.assertEqual(mask,
+                             wildcard.untokenize(wildcard.tokenize(mask)))
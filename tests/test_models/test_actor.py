@@ -0,0 +1,86 @@
+import unittest
+
+import gevent
+from mock import Mock
+
+from config import config
+from include.message import Message as M
+from models import Actor
+from models.actor import send_buffers
+
+
+def sendmsg(buffers):
+    return sum(len(data) for data in buffers)
+
+
+class ActorTest(unittest.TestCase):
+    def setUp(self):
+        self.actor = Actor(Mock())
+        self.actor.socket.sendmsg.side_effect = sendmsg
+
+    def tearDown(self):
+        config.set('server', 'sendq_limit', '1048576')
+        config.set('server', 'sendq_high_water', '262144')
+        config.set('server', 'write_coalesce_ms', '5')
+
+    def test_sendq(self):
+        self.actor.write(M(None, 'PING', 'a'))
+        self.actor.write(M(None, 'PING', 'b'))
+        self.assertEqual(16, self.actor.sendq_size)
+        self.actor.flush()
+        self.assertFalse(self.actor.socket.sendmsg.called)
+        gevent.sleep(0.01)
+        self.assertEqual(0, self.actor.sendq_size)
+        # Both messages are written with one call
+        self.actor.socket.sendmsg.assert_called_once_with(
+            [b'PING a\r\n', b'PING b\r\n'])
+        self.assertEqual(2, self.actor.sent_messages)
+
+    def test_coalesce_until_idle(self):
+        def send():
+            self.actor.write(M(None, 'PING', 'b'))
+            self.actor.flush()
+        self.actor.write(M(None, 'PING', 'a'))
+        self.actor.flush()
+        gevent.spawn(send)
+        gevent.sleep(0.01)
+        self.actor.socket.sendmsg.assert_called_once_with(
+            [b'PING a\r\n', b'PING b\r\n'])
+
+    def test_partial_send(self):
+        # Only the first 3 bytes are sent by each call
+        socket = Mock()
+        sent = []
+        socket.sendmsg.side_effect = lambda buffers: (
+            sent.append(bytes(buffers[0][:3])) or min(3, len(buffers[0])))
+        send_buffers(socket, [b'abcd', b'ef', b'ghijk'])
+        self.assertEqual([b'abc', b'd', b'ef', b'ghi', b'jk'], sent)
+
+    def test_sendq_exceeded(self):
+        config.set('server', 'sendq_limit', '10')
+        self.actor.write(M(None, 'PING', 'a'))
+        self.assertFalse(self.actor.connection_dropped)
+        self.actor.write(M(None, 'PING', 'b'))
+        self.assertTrue(self.actor.connection_dropped)
+        self.assertEqual('SendQ exceeded', self.actor.drop_reason)
+        self.assertEqual(0, self.actor.sendq_size)
+
+    def test_high_water(self):
+        config.set('server', 'sendq_high_water', '10')
+        self.actor.write(M(None, 'PING', 'a'))
+        self.assertTrue(self.actor.is_readable())
+        self.actor.write(M(None, 'PING', 'b'))
+        self.assertFalse(self.actor.is_readable())
+        self.actor.flush()
+        self.actor.wait_readable()
+        self.assertTrue(self.actor.is_readable())
+
+    def test_close_after_sending(self):
+        self.actor.write(M(None, 'ERROR', 'bye'))
+        self.actor.flush()
+        self.actor.close('signal')
+        self.assertFalse(self.actor.socket.close.called)
+        gevent.sleep(0.01)
+        self.actor.socket.sendmsg.assert_called_once_with([b'ERROR bye\r\n'])
+        self.actor.socket.shutdown.assert_called_with('signal')
+        self.actor.socket.close.assert_called_once_with()
@@ -0,0 +1,128 @@
+import unittest
+from mock import Mock, call, patch
+
+from models import Actor, Channel, User
+from models import channel
+
+
+class ChannelTest(unittest.TestCase):
+    def setUp(self):
+        self.channel = Channel('#test')
+        self.users = []
+        for nick in ['a', 'b', 'c']:
+            user = User(nick)
+            Actor(Mock()).user = user
+            self.users.append(user)
+
+    def test_membership_order(self):
+        for user in reversed(self.users):
+            user.join(self.channel)
+        self.users[0].join(self.channel)
+        self.assertEqual(['c', 'b', 'a'],
+                         [user.nickname for user in self.channel.users])
+        self.users[1].part(self.channel)
+        self.assertEqual(['c', 'a'],
+                         [user.nickname for user in self.channel.users])
+        self.assertNotIn(self.channel, self.users[1].channels)
+
+    def test_recipients(self):
+        a, b, c = self.users
+        a.join(self.channel)
+        b.join(self.channel)
+        recipients = self.channel.recipients
+        self.assertIs(recipients, self.channel.recipients)
+        self.assertEqual(set([a.actor, b.actor]), set(recipients))
+        c.join(self.channel)
+        self.assertIsNot(recipients, self.channel.recipients)
+        self.assertIn(c.actor, self.channel.recipients)
+        c.part(self.channel)
+        self.assertNotIn(c.actor, self.channel.recipients)
+
+    def test_excluding(self):
+        for user in self.users:
+            user.join(self.channel)
+        a, b, c = [user.actor for user in self.users]
+        others = self.channel.recipients.excluding(a)
+        self.assertIs(self.channel.recipients.children, others.children)
+        self.assertEqual(set([b, c]), set(others))
+        self.assertNotIn(a, others)
+        with patch.object(Actor, 'write') as write:
+            others.write('message')
+        self.assertEqual([call('message'), call('message')],
+                         write.call_args_list)
+
+    def test_user_delete(self):
+        for channel in [self.channel, Channel('#other')]:
+            self.users[0].join(channel)
+        self.users[0].save()
+        self.users[0].delete()
+        self.assertEqual(0, len(self.users[0].channels))
+        self.assertNotIn(self.users[0], self.channel.users)
+
+    def test_neighbours(self):
+        a, b, c = self.users
+        other = Channel('#other')
+        for user in [a, b]:
+            user.join(self.channel)
+            user.join(other)
+        c.join(other)
+        self.assertEqual({b: 2, c: 1}, a.neighbours)
+        self.assertEqual({a: 1, b: 1}, c.neighbours)
+        b.part(self.channel)
+        self.assertEqual({b: 1, c: 1}, a.neighbours)
+        b.part(other)
+        self.assertEqual({c: 1}, a.neighbours)
+        self.assertEqual({}, b.neighbours)
+
+    @patch.object(channel, 'NEIGHBOUR_LIMIT', 4)
+    def test_large_neighbours(self):
+        "Members of large channels are only found when asked for"
+        a, b, c = self.users
+        others = [User('user%d' % number) for number in range(4)]
+        small = Channel('#small')
+        a.join(small)
+        b.join(small)
+        for user in [a, b, c] + others:
+            user.join(self.channel)
+        self.assertFalse(self.channel.tracks_neighbours)
+        self.assertEqual({b: 1}, a.neighbours)
+        self.assertEqual({}, c.neighbours)
+        self.assertEqual([b, c] + others, list(a.all_neighbours()))
+        self.assertEqual([a, b] + others, list(c.all_neighbours()))
+        for user in others + [c]:
+            user.part(self.channel)
+        self.assertTrue(self.channel.tracks_neighbours)
+        self.assertEqual({b: 2}, a.neighbours)
+        self.assertIs(a.neighbours, a.all_neighbours())
+        self.assertEqual({}, c.all_neighbours())
+        b.part(self.channel)
+        self.assertEqual({b: 1}, a.neighbours)
+
+    def test_names(self):
+        a, b, c = self.users
+        a.join(self.channel)
+        b.join(self.channel)
+        names = self.channel.names(3)
+        self.assertEqual([b'a b'], names)
+        self.assertIs(names, self.channel.names(3))
+        # Joins are added to the cached lines
+        c.join(self.channel)
+        self.assertIs(names, self.channel.names(3))
+        self.assertEqual([b'a b', b'c'], names)
+        self.assertEqual([b'a b c'], self.channel.names(10))
+
+    def test_names_rebuilt(self):
+        a, b, c = self.users
+        for user in self.users:
+            user.join(self.channel)
+        names = self.channel.names(10)
+        b.part(self.channel)
+        self.assertEqual([b'a c'], self.channel.names(10))
+        names = self.channel.names(10)
+        a.save()
+        a.rename('renamed')
+        self.assertEqual([b'renamed c'], self.channel.names(10))
+        a.delete()
+        names = self.channel.names(10)
+        self.channel.mode.invite_only = True
+        self.assertIsNot(names, self.channel.names(10))
@@ -0,0 +1,87 @@
+import unittest
+
+from models.base import BaseModel
+from models.index import Index
+
+
+class Host(BaseModel):
+    by_name = Index('name', suffixes=True)
+
+    def __init__(self, key, name):
+        super(Host, self).__init__()
+        self.key = key
+        self.name = name
+
+    def get_key(self):
+        return self.key
+
+    def _set_key(self, new_key):
+        self.key = new_key
+
+
+class IndexTest(unittest.TestCase):
+    def setUp(self):
+        self.hosts = [Host(number, name) for number, name in enumerate([
+            'a.isp.net', 'b.isp.net', 'a.other.org', 'isp.net', 'a.isp.net',
+            None])]
+        for host in self.hosts:
+            host.save()
+
+    def tearDown(self):
+        for host in Host.all():
+            Host.by_name.remove(host)
+        BaseModel.objects[Host] = {}
+
+    def match(self, mask):
+        return sorted(host.key for host in Host.by_name.match(mask))
+
+    def test_get(self):
+        self.assertEqual([self.hosts[0], self.hosts[4]],
+                         Host.by_name.get('a.isp.net'))
+        self.assertEqual([], Host.by_name.get('nothing'))
+
+    def test_match(self):
+        self.assertEqual([0, 1, 4], self.match('*.isp.net'))
+        self.assertEqual([0, 2, 4], self.match('a.*'))
+        self.assertEqual([0, 1, 3, 4], self.match('*isp*'))
+        self.assertEqual([0, 1, 4], self.match('?.isp.net'))
+        self.assertEqual([3], self.match('isp.net'))
+        self.assertEqual([0, 1, 2, 3, 4], self.match('*'))
+        self.assertEqual([], self.match('*.com'))
+
+    def test_fold_not_str(self):
+        "Folded values that can't be interned, like unicode on Python 2"
+        index = Index('name', lambda name: name.encode())
+        index.add(self.hosts[0])
+        self.assertEqual([self.hosts[0]], index.get('a.isp.net'))
+        index.remove(self.hosts[0])
+
+    def test_prefix_and_suffix(self):
+        self.assertEqual(['a.isp.net', 'a.other.org'],
+                         list(Host.by_name.with_prefix('a.')))
+        self.assertEqual(['isp.net', 'a.isp.net', 'b.isp.net'],
+                         sorted(Host.by_name.with_suffix('isp.net'),
+                                key=len))
+
+    def test_updates(self):
+        host = self.hosts[3]
+        host.name = 'c.isp.net'
+        host.save()
+        self.assertEqual([0, 1, 3, 4], self.match('*.isp.net'))
+        self.assertEqual([], Host.by_name.get('isp.net'))
+        host.set_key(10)
+        self.assertEqual([0, 1, 4, 10], self.match('*.isp.net'))
+        host.delete()
+        self.hosts[0].delete()
+        self.assertEqual([1, 4], self.match('*.isp.net'))
+        self.assertNotIn('isp.net', Host.by_name.sorted)
+        self.assertEqual(['a.isp.net', 'a.other.org', 'b.isp.net'],
+                         Host.by_name.sorted)
+
+    def test_without_suffixes(self):
+        index = Index('name')
+        for host in self.hosts:
+            index.add(host)
+        self.assertEqual([], index.sorted_reversed)
+        self.assertEqual([0, 1, 4], sorted(
+            host.key for host in index.match('*.isp.net')))
@@ -0,0 +1,57 @@
+import unittest
+from mock import Mock
+
+from models import Actor, Channel, User, lifecycle
+
+
+class LifecycleTest(unittest.TestCase):
+    def counts(self, cls):
+        counter = lifecycle.counter(cls)
+        return counter.live, counter.created, counter.destroyed
+
+    def test_counters(self):
+        live, created, destroyed = self.counts(User)
+        user = User('counted')
+        self.assertEqual((live, created, destroyed), self.counts(User))
+        user.save()
+        user.rename('renamed')
+        self.assertEqual((live + 1, created + 1, destroyed),
+                         self.counts(User))
+        user.delete()
+        self.assertEqual((live, created + 1, destroyed + 1),
+                         self.counts(User))
+        # Already deleted, like a channel its last member parted
+        user.delete()
+        self.assertEqual((live, created + 1, destroyed + 1),
+                         self.counts(User))
+
+    def test_empty_channel_deleted(self):
+        users = [User('a'), User('b')]
+        channel = Channel('#empty')
+        channel.save()
+        for user in users:
+            user.join(channel)
+        users[0].part(channel)
+        self.assertTrue(Channel.exists('#empty'))
+        users[1].part(channel)
+        self.assertFalse(Channel.exists('#empty'))
+
+    def test_persistent_channel_kept(self):
+        user = User('a')
+        channel = Channel('#kept')
+        channel.persistent = True
+        channel.save()
+        try:
+            user.join(channel)
+            user.part(channel)
+            self.assertTrue(Channel.exists('#kept'))
+        finally:
+            channel.delete()
+
+    def test_actor_forgotten_on_close(self):
+        socket = Mock()
+        actor = Actor.by_socket(socket)
+        self.assertIs(actor, Actor.by_socket(socket))
+        actor.close('signal')
+        self.assertFalse(Actor.exists(socket))
+        socket.close.assert_called_once_with()
@@ -0,0 +1,85 @@
+import unittest
+
+from models import Error, Channel, User
+
+
+class CasemappingTest(unittest.TestCase):
+    def setUp(self):
+        self.user = User('Nick[a]')
+        self.user.save()
+
+    def tearDown(self):
+        for user in list(User.all()):
+            user.delete()
+
+    def test_lookup(self):
+        for nick in ['Nick[a]', 'nick{a}', 'NICK{A]']:
+            self.assertTrue(User.exists(nick))
+            self.assertIs(self.user, User.get(nick))
+        self.assertFalse(User.exists('nick'))
+        self.assertRaises(Error, User.get, 'nick')
+
+    def test_collision(self):
+        self.assertRaises(Error, User('NICK{A}').save)
+        other = User('other')
+        other.save()
+        self.assertRaises(Error, other.rename, 'nick[A]')
+        self.assertEqual('other', other.nickname)
+
+    def test_rename_case(self):
+        self.user.rename('NICK[A]')
+        self.assertEqual('NICK[A]', self.user.nickname)
+        self.assertIs(self.user, User.get('Nick[a]'))
+        self.assertEqual([self.user], User.by_nickname.get('nick{a}'))
+        self.assertEqual(1, len(list(User.all())))
+
+    def test_rename(self):
+        self.user.rename('Other')
+        self.assertFalse(User.exists('nick[a]'))
+        self.assertIs(self.user, User.get('other'))
+        self.assertEqual([self.user], list(User.by_nickname.match('OTH*')))
+        self.assertEqual([], list(User.by_nickname.match('nick*')))
+
+    def test_channel(self):
+        channel = Channel('#Chan[1]')
+        channel.save()
+        try:
+            self.assertIs(channel, Channel.get('#chan{1}'))
+            self.assertEqual('#Chan[1]', str(channel))
+        finally:
+            channel.delete()
+
+
+class FlagsTest(unittest.TestCase):
+    def test_registered(self):
+        user = User('nick')
+        self.assertFalse(user.registered.both)
+        user.registered.nick = True
+        self.assertTrue(user.registered.nick)
+        self.assertFalse(user.registered.user)
+        user.registered.user = True
+        self.assertTrue(user.registered.both)
+        user.registered.nick = False
+        self.assertFalse(user.registered.both)
+        self.assertEqual(2, user.registration)
+
+    def test_mode(self):
+        user = User('nick')
+        user.mode.invisible = True
+        user.mode.operator = True
+        self.assertTrue(user.mode.invisible)
+        self.assertFalse(user.mode.wallops)
+        user.mode.invisible = False
+        self.assertFalse(user.mode.invisible)
+        self.assertTrue(user.mode.operator)
+
+    def test_no_dict(self):
+        self.assertRaises(AttributeError, setattr, User('nick'), 'other', 1)
+
+    def test_channel_mode(self):
+        channel = Channel('#chan')
+        self.assertTrue(channel.mode.distributed)
+        self.assertFalse(channel.mode.invite_only)
+        channel.mode.invite_only = True
+        self.assertTrue(channel.mode.invite_only)
+        self.assertFalse(Channel('#other').mode.invite_only)